@@ -0,0 +1,119 @@
+# -*- coding:Utf-8 -*-
+
+import os
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+from console import Console
+import argparse
+import sys
+import tempfile
+import time
+
+
+class BatchRunner(Console):
+    def __init__(self, plugins_path='plugins.txt', plot_directory=None, snapshot_path=None):
+        super().__init__()
+        # Without a display, plots are always written to files: a temporary directory is used when none is given.
+        self.plot_directory = plot_directory or tempfile.mkdtemp(prefix='worksheet-plots-')
+        self.restore_path = snapshot_path
+        self.load_plugins(plugins_path)
+        
+    def run(self, lines, name='stdin'):
+        self.reset()
+        self._set_plot_directory(name)
+        if self.restore_path is not None:
+            for error in self.restore_snapshot(self.restore_path):
+                print(f'{name}: snapshot error: {error}', file=sys.stderr)
+        
+        for line_number, base_line in enumerate(lines, 1):
+            base_line = base_line.rstrip('\n')
+            if not base_line.strip():
+                continue
+            start = time.perf_counter()
+            line, execution, value = self.run_line(base_line)
+            yield line_number, base_line, execution, value, time.perf_counter() - start
+    
+    def _set_plot_directory(self, name):
+        self.set_plot_directory(worksheet_plot_directory(self.plot_directory, name))
+
+
+def worksheet_plot_directory(plot_directory, name):
+    return os.path.join(plot_directory, os.path.splitext(os.path.basename(name))[0])
+
+
+def run_files(runner, paths, out=sys.stdout, quiet=False, timing=False):
+    total_lines = 0
+    total_errors = 0
+    total_start = time.perf_counter()
+    
+    for path in paths:
+        if path == '-':
+            name, file = 'stdin', sys.stdin
+        else:
+            name, file = path, open(path, encoding='utf8')
+            
+        lines = 0
+        errors = 0
+        start = time.perf_counter()
+        try:
+            for line_number, base_line, execution, value, elapsed in runner.run(file, name):
+                lines += 1
+                if execution != 0:
+                    errors += 1
+                    print(f'{name}:{line_number}: Error: {value}', file=sys.stderr)
+                elif not quiet:
+                    print(f'> {base_line}', file=out)
+                    if value is not None:
+                        print(f'Out: {runner.format_value(value)}', file=out)
+                if timing:
+                    print(f'{name}:{line_number}: {elapsed * 1000:.3f} ms', file=sys.stderr)
+        finally:
+            if file is not sys.stdin:
+                file.close()
+                
+        elapsed = time.perf_counter() - start
+        total_lines += lines
+        total_errors += errors
+        if timing:
+            print(_summary(name, lines, errors, elapsed), file=sys.stderr)
+            
+    if timing:
+        print(_summary('total', total_lines, total_errors, time.perf_counter() - total_start), file=sys.stderr)
+    return total_errors
+
+
+def _summary(name, lines, errors, elapsed):
+    rate = lines / elapsed if elapsed else 0
+    return f'{name}: {lines} lines, {errors} errors in {elapsed:.3f} s ({rate:.1f} lines/s)'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run math-syntax worksheets without a display.')
+    parser.add_argument('files', nargs='*', default=['-'], help="worksheets to run, '-' reads stdin")
+    parser.add_argument('--plugins', default='plugins.txt', help='plugin list to load')
+    parser.add_argument('--plot-dir', default=None, help='directory where plots are saved')
+    parser.add_argument('--kernel', default=None, help='run the worksheets on a running kernel (socket path or host:port)')
+    parser.add_argument('--kernel-token', default=None, help='token of a kernel listening on TCP (default $MATH_KERNEL_TOKEN)')
+    parser.add_argument('--restore', default=None, help='session snapshot restored before each worksheet')
+    parser.add_argument('--max-terms', type=int, default=None, help='truncate displayed expressions to this many terms')
+    parser.add_argument('--quiet', action='store_true', help='only report errors')
+    parser.add_argument('--timing', action='store_true', help='report per-line timings and throughput')
+    args = parser.parse_args(argv)
+    
+    if args.kernel is not None:
+        from kernel import RemoteRunner
+        runner = RemoteRunner(args.kernel, args.kernel_token, args.plot_dir, args.restore, args.max_terms)
+    else:
+        runner = BatchRunner(args.plugins, args.plot_dir, args.restore)
+        runner.max_displayed_terms = args.max_terms
+    if args.timing:
+        for name, elapsed in runner.plugin_load_times.items():
+            print(f'plugin {name}: {elapsed * 1000:.3f} ms', file=sys.stderr)
+    errors = run_files(runner, args.files, quiet=args.quiet, timing=args.timing)
+    if args.kernel is None and args.plot_dir is None and any(files for _, _, files in os.walk(runner.plot_directory)):
+        print(f'plots saved to {runner.plot_directory}', file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
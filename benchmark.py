@@ -0,0 +1,254 @@
+# -*- coding:Utf-8 -*-
+
+import os
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+from math_utils.dag import develop_shared
+from math_utils.expressions import Expression, Term
+from math_utils.math_sets import Interval, ListSet, NATURAL, RELATIVE
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+scenarios = {}
+
+
+def scenario(*sizes):
+    def decorator(setup):
+        scenarios[setup.__name__] = (setup, sizes)
+        return setup
+    return decorator
+
+
+def polynom(size, variable='x', offset=0):
+    expression = Expression(Term(1 + offset, **{variable: 0}))
+    for i in range(1, size):
+        expression += Term(i + 1 + offset, **{variable: i})
+    return expression
+
+
+@scenario(100, 200, 400)
+def addition_chain(size):
+    terms = [Term(i + 1, x=i) for i in range(size)]
+
+    def run():
+        expression = Expression(terms[0])
+        for term in terms[1:]:
+            expression += term
+        return expression
+    return run
+
+
+@scenario(5, 10, 20)
+def develop_product(size):
+    product = polynom(size) * (polynom(size, 'y') + polynom(size, offset=1))
+
+    def run():
+        return product.develop()
+    return run
+
+
+@scenario(100, 300, 1000)
+def sparse_product(size):
+    first = Expression.from_terms([Term(i + 1, x=i * i, y=i % 7) for i in range(size)])
+    second = Expression.from_terms([Term(i - 3, x=i, z=i * i % 11) for i in range(size)])
+    product = first * second
+
+    def run():
+        return product.develop()
+    return run
+
+
+@scenario(50, 100, 200)
+def expression_power(size):
+    binomial = (Expression(Term(2, x=1)) + Term(-3)) ** size
+    trinomial = (Expression(Term(1, x=1)) + Term(1, y=1) + Term(1)) ** (size // 5)
+
+    def run():
+        return binomial.develop(), trinomial.develop()
+    return run
+
+
+@scenario(100, 1000)
+def substitution_sweep(size):
+    model = ((Expression(Term(1, x=1)) + Term(2, y=1) + Term(-1, z=1) + Term(1)) ** 8).develop()
+    plan = model.substitution_plan('x', 'y', 'z')
+    value_sets = [(i / size, 1 - i / size, 0.5) for i in range(size)]
+
+    def run():
+        return plan.evaluate_many(value_sets)
+    return run
+
+
+@scenario(5, 10, 20)
+def truncated_develop(size):
+    series = Expression.from_terms([Term(1, x=i, y=i % 3) for i in range(200)])
+    product = (series ** 3) * series
+
+    def run():
+        return product.develop(max_degree=size)
+    return run
+
+
+@scenario(50, 100, 200)
+def factorization(size):
+    x = Expression(Term(1, x=1))
+    polynom = ((x ** (size // 2) + Term(3, x=1) - Term(1)) * (x ** (size - size // 2) - Term(2, x=2) + Term(5))).develop()
+
+    def run():
+        return polynom.factor()
+    return run
+
+
+@scenario(4, 6, 8)
+def develop_shared_squares(size):
+    expression = Expression(Term(1, x=1), Expression(Term(-1)))
+    for _ in range(size):
+        expression = expression * expression
+
+    def run():
+        return develop_shared(expression)
+    return run
+
+
+@scenario(100, 200, 400)
+def repr_large_expression(size):
+    expression = polynom(size) + polynom(size, 'y')
+
+    def run():
+        # The repr is cached until the next mutation: a new epoch makes every call compute it again.
+        Expression._epoch += 1
+        return repr(expression)
+    return run
+
+
+@scenario(100, 1000)
+def expression_equality(size):
+    expressions = [polynom(size, offset=i) for i in range(20)]
+    expressions += [polynom(size, offset=i) for i in range(20)]
+
+    def run():
+        groups = {}
+        for expression in expressions:
+            groups.setdefault(expression, []).append(expression)
+        return sum(expression_1 == expression_2 for expression_1 in expressions for expression_2 in expressions)
+    return run
+
+
+@scenario(10000, 100000)
+def term_memory(size):
+    def run():
+        return [Term(i + 1, x=i % 97, y=i % 89) for i in range(size)]
+    return run
+
+
+@scenario(1000, 10000)
+def set_membership(size):
+    composed = ((Interval(0, size, True, False) & NATURAL) | ListSet(tuple(range(-10, 0)))) - Interval(size // 4, size // 2, True, True)
+    values = list(range(-size // 2, size)) + [i / 3 for i in range(size)]
+
+    def run():
+        return sum(1 for value in values if value in composed and value in RELATIVE)
+    return run
+
+
+@scenario(10 ** 6, 10 ** 9)
+def set_aggregates(size):
+    composed = ((Interval(0, size, True, False) & NATURAL) | ListSet(tuple(range(-10, 0)))) - Interval(size // 4, size // 2, True, True)
+
+    def run():
+        return len(composed), composed.min(), composed.max(), composed.sum(), composed[size // 3]
+    return run
+
+
+@scenario(1000, 10000)
+def plot_sampling(size):
+    from plugins.math_plot import PlottingPlugin
+
+    plugin = PlottingPlugin()
+    interval = Interval(-10, 10, True, True)
+
+    def function(x):
+        return x ** 3 - 2 * x if x != 0 else float('nan')
+
+    def run():
+        # Only the sampling is timed: plot() would also render and write an image file.
+        return plugin._sample(function, interval, size, 100, -100)
+    return run
+
+
+def measure(setup, size, repeat):
+    run = setup(size)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        run()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {'best': min(timings), 'mean': sum(timings) / repeat, 'repeat': repeat, 'peak_memory': peak_memory,
+            'peak_memory_per_item': peak_memory / size}
+
+
+def run_benchmarks(names=None, repeat=5, out=sys.stderr):
+    results = []
+    for name, (setup, sizes) in scenarios.items():
+        if names and name not in names:
+            continue
+        for size in sizes:
+            try:
+                result = measure(setup, size, repeat)
+            except ImportError as error:
+                print(f'{name}[{size}]: skipped ({error})', file=out)
+                break
+            result.update(scenario=name, size=size)
+            results.append(result)
+            print(f"{name}[{size}]: {result['best'] * 1000:.3f} ms best, {result['mean'] * 1000:.3f} ms mean, "
+                  f"{result['peak_memory'] / 1024:.1f} KiB peak", file=out)
+    return results
+
+
+def compare(results, previous_results, out=sys.stderr):
+    previous = {(result['scenario'], result['size']): result for result in previous_results}
+    for result in results:
+        old = previous.get((result['scenario'], result['size']))
+        if old is None:
+            continue
+        print(f"{result['scenario']}[{result['size']}]: time x{result['best'] / old['best']:.2f}, "
+              f"memory x{result['peak_memory'] / max(old['peak_memory'], 1):.2f}", file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the math_utils hot paths.')
+    parser.add_argument('scenarios', nargs='*', help=f'scenarios to run among {", ".join(scenarios)}')
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs per scenario')
+    parser.add_argument('--output', default=None, help='write the results as JSON to this file')
+    parser.add_argument('--compare', default=None, help='JSON results of a previous run to compare against')
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.scenarios, args.repeat)
+
+    if args.compare:
+        with open(args.compare, encoding='utf8') as file:
+            compare(results, json.load(file)['results'])
+
+    document = {'python': platform.python_version(), 'platform': platform.platform(), 'time': time.time(), 'results': results}
+    if args.output:
+        with open(args.output, 'w', encoding='utf8') as file:
+            json.dump(document, file, indent=4)
+    else:
+        json.dump(document, sys.stdout, indent=4)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
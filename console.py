@@ -0,0 +1,285 @@
+# -*- coding:Utf-8 -*-
+
+from collections import OrderedDict
+from plugins.console_functions import ConsoleFunction
+from snapshots import save_snapshot, load_snapshot
+import plugins
+import cProfile
+import dis
+import io
+import json
+import os
+import pstats
+import time
+import traceback
+import types
+
+
+class Console:
+    max_displayed_terms = 200
+    profile_rows = 20
+    code_cache_size = 4096
+    snapshot_path = 'session.snapshot'
+    
+    def __init__(self):
+        self._plugins = {}
+        self._sequences = []
+        self.plugin_load_times = {}
+        
+        self.commands = {}
+        
+        self._locals = {}
+        self._globals = {}
+        self._code_cache = OrderedDict()
+        self._sources = {}
+        self._stored_names = OrderedDict()
+        
+        self.stats = PipelineStats()
+        self._profile = None
+        self.magic_commands = {'%time': self.time_command, '%prof': self.prof_command, '%stats': self.stats_command,
+                               '%save': self.save_command, '%restore': self.restore_command}
+    
+    def load_plugins(self, path='plugins.txt'):
+        with open(path) as file:
+            txt = file.read()
+            
+        for line in txt.splitlines():
+            if line and not line.startswith('//'):
+                start = time.perf_counter()
+                self.add_plugin(line, plugins.get_plugin(line)())
+                self.plugin_load_times[line] = time.perf_counter() - start
+    
+    def reset(self):
+        self._locals.clear()
+        self._globals.clear()
+        self._sources.clear()
+    
+    def save_snapshot(self, path):
+        return save_snapshot(self._locals, self._sources, path)
+    
+    def restore_snapshot(self, path):
+        values, sources = load_snapshot(path)
+        self._precompile_line('')
+        self._locals.update(values)
+        
+        errors = []
+        for line in dict.fromkeys(line for _, line in sources):
+            execution, value = self._execute_line(line)
+            if execution != 0:
+                errors.append(f'{line}: {value}')
+        return errors
+    
+    def run_line(self, base_line):
+        if base_line.lstrip().startswith('%'):
+            return self._run_magic_command(base_line)
+        
+        self.stats.start_line(base_line)
+        line = self._precompile_line(base_line)
+        execution, value = self._execute_line(line)
+        self.stats.end_line(line)
+        return line, execution, value
+    
+    def format_value(self, value):
+        if hasattr(value, 'render'):
+            return value.render(self.max_displayed_terms)
+        return str(value)
+    
+    def _run_magic_command(self, base_line):
+        name, _, argument = base_line.strip().partition(' ')
+        if name not in self.magic_commands:
+            return base_line, -1, f'unknown command {name}, available commands: {", ".join(self.magic_commands)}'
+        try:
+            return base_line, 0, self.magic_commands[name](argument.strip())
+        except Exception:
+            return base_line, -1, traceback.format_exc()
+    
+    def _precompile_line(self, line):
+        for function in self._sequences:
+            start = time.perf_counter()
+            line = function(line, self._locals, self._globals)
+            self.stats.record(_action_name(function), time.perf_counter() - start)
+        return line
+    
+    def _cache(self, cache, key, value):
+        cache[key] = value
+        if len(cache) > self.code_cache_size:
+            cache.popitem(last=False)
+        return value
+    
+    def _compile_line(self, line):
+        try:
+            code = self._code_cache[line]
+        except KeyError:
+            pass
+        else:
+            self._code_cache.move_to_end(line)
+            return code
+        
+        try:
+            code = compile(line, '<console>', 'eval'), True
+        except SyntaxError:
+            code = None
+        if code is None:
+            code = compile(line, '<console>', 'exec'), False
+        return self._cache(self._code_cache, line, code)
+    
+    def _execute_line(self, line):
+        try:
+            start = time.perf_counter()
+            code, is_expression = self._compile_line(line)
+            self.stats.record('compile', time.perf_counter() - start)
+            
+            start = time.perf_counter()
+            try:
+                value = self._run_code(code, is_expression)
+            finally:
+                self.stats.record('execute', time.perf_counter() - start)
+            if not is_expression:
+                self._record_sources(line, code)
+            return 0, value
+        except Exception:
+            return -1, traceback.format_exc()
+    
+    def _run_code(self, code, is_expression):
+        if self._profile is not None:
+            profile, self._profile = self._profile, None
+            return profile.runcall(self._run_code, code, is_expression)
+        if is_expression:
+            return eval(code, self._globals, self._locals)
+        exec(code, self._globals, self._locals)
+        return None
+    
+    def _record_sources(self, line, code):
+        try:
+            stored_names = self._stored_names[code]
+            self._stored_names.move_to_end(code)
+        except KeyError:
+            stored_names = self._cache(self._stored_names, code, {instruction.argval for instruction in dis.get_instructions(code)
+                                                                  if instruction.opname == 'STORE_NAME'})
+        for name in stored_names:
+            self._sources.pop(name, None)
+            if isinstance(self._locals.get(name), (types.FunctionType, types.ModuleType, ConsoleFunction)):
+                self._sources[name] = line
+    
+    def time_command(self, argument):
+        if self.stats.last is None:
+            return 'no line executed yet'
+        return self.stats.last.report()
+    
+    def prof_command(self, argument):
+        # The line runs once, through the usual pipeline, with the profiler wrapping its execution only.
+        if not argument:
+            return 'usage: %prof <line>'
+        profile = self._profile = cProfile.Profile()
+        try:
+            _, execution, value = self.run_line(argument)
+        finally:
+            self._profile = None
+        stream = io.StringIO()
+        pstats.Stats(profile, stream=stream).sort_stats('cumulative').print_stats(self.profile_rows)
+        if execution != 0:
+            output = value
+        else:
+            output = '' if value is None else self.format_value(value)
+        return f'{output}\n{stream.getvalue().strip()}'.strip()
+    
+    def save_command(self, argument):
+        path = argument or self.snapshot_path
+        skipped = self.save_snapshot(path)
+        if skipped:
+            return f'session saved to {path}, not saved: {", ".join(skipped)}'
+        return f'session saved to {path}'
+    
+    def restore_command(self, argument):
+        path = argument or self.snapshot_path
+        errors = self.restore_snapshot(path)
+        if errors:
+            return f'session restored from {path} with errors:\n' + '\n'.join(errors)
+        return f'session restored from {path}'
+    
+    def stats_command(self, argument):
+        if argument:
+            self.stats.export(argument)
+            return f'stats exported to {argument}'
+        return self.stats.report()
+    
+    def set_plot_directory(self, directory):
+        for plugin in self._plugins.values():
+            if hasattr(plugin, 'output_directory'):
+                os.makedirs(directory, exist_ok=True)
+                plugin.output_directory = directory
+                plugin._plot_count = 0
+    
+    def add_shortcut(self, str_sequence, command):
+        pass
+    
+    def add_sequence(self, function):
+        self._sequences.append(function)
+    
+    def add_plugin(self, name, plugin):
+        self._plugins[name] = plugin
+        plugin.add_to(self)
+
+
+class LineTimings:
+    def __init__(self, base_line):
+        self.base_line = base_line
+        self.line = None
+        self.timings = []
+        
+    @property
+    def total(self):
+        return sum(elapsed for _, elapsed in self.timings)
+    
+    def report(self):
+        txt = f'{self.base_line}\n'
+        for name, elapsed in self.timings:
+            txt += f'  {name}: {elapsed * 1000:.3f} ms\n'
+        txt += f'  total: {self.total * 1000:.3f} ms'
+        return txt
+
+
+class PipelineStats:
+    def __init__(self):
+        self.totals = {}
+        self.lines = 0
+        self.current = None
+        self.last = None
+        
+    def start_line(self, base_line):
+        self.current = LineTimings(base_line)
+        
+    def end_line(self, line):
+        self.current.line = line
+        self.last = self.current
+        self.current = None
+        self.lines += 1
+    
+    def record(self, name, elapsed):
+        if self.current is not None:
+            self.current.timings.append((name, elapsed))
+            
+        calls, total, maximum = self.totals.get(name, (0, 0, 0))
+        self.totals[name] = (calls + 1, total + elapsed, max(maximum, elapsed))
+        
+    def to_dict(self):
+        actions = {}
+        for name, (calls, total, maximum) in self.totals.items():
+            actions[name] = {'calls': calls, 'total': total, 'mean': total / calls, 'max': maximum}
+        return {'lines': self.lines, 'actions': actions}
+    
+    def export(self, path):
+        with open(path, 'w', encoding='utf8') as file:
+            json.dump(self.to_dict(), file, indent=4)
+    
+    def report(self):
+        txt = f'{self.lines} lines'
+        for name, (calls, total, maximum) in sorted(self.totals.items(), key=lambda item: -item[1][1]):
+            txt += f'\n  {name}: {calls} calls, {total * 1000:.3f} ms total, {total / calls * 1000:.3f} ms mean, {maximum * 1000:.3f} ms max'
+        return txt
+
+
+def _action_name(function):
+    if hasattr(function, '__self__'):
+        return f'{type(function.__self__).__name__}.{function.__name__}'
+    return getattr(function, '__qualname__', repr(function))
@@ -21,7 +21,7 @@ if __name__ == '__main__':
     
     print('Editing __init__.py...')
     with open('plugins/__init__.py', 'a', encoding='utf8') as file:
-        file.write(f'from .{plugin_name} import {class_name}')
+        file.write(f"\n_plugin_modules['{class_name}'] = '{plugin_name}'")
     print('Done.\n')
     
     print('Editing plugins.txt...')    
@@ -1,48 +1,17 @@
 # -*- coding:Utf-8 -*-
 
 
-from collections import UserDict
+from math_utils.expressions import Variables
 from typing import Any, Union, Sequence, Mapping, Set, AbstractSet
 from types import MappingProxyType
 import abc
 
-
-class Variables(UserDict):
-    def __missing__(self, _: Any) -> int:
-        return 0
-    
-    def __setitem__(self, key: Any, value: int) -> None:
-        if value == 0:
-            if key in self:
-                self.pop(key)
-        else:
-            super().__setitem__(key, value)
-    
-    def __eq__(self, other_dict: Any) -> bool:
-        if not isinstance(other_dict, Variables):
-            try:
-                other_dict = Variables(other_dict)
-            except TypeError:
-                return NotImplemented
-            
-        for key in self.keys() | other_dict.keys():
-            if self[key] != other_dict[key]:
-                return False
-            
-        return True
-    
-    def __iadd__(self, variables2):
-        if not isinstance(variables2, Variables):
-            return NotImplemented
-        for k, v in variables2.items():
-            self[k] += v
-        return self
-    
-    def length_without_null_values(self) -> int:
-        return len(list(v for v in self.values() if v != 0))
+SUPERSCRIPTS = str.maketrans('-0123456789', '⁻⁰¹²³⁴⁵⁶⁷⁸⁹')
 
 
 class AbstractExpression(metaclass=abc.ABCMeta):
+    __slots__ = ('term', 'rest_of_expression')
+    
     def __init__(self, term, rest_of_expression):
         self.term = term
         self.rest_of_expression = rest_of_expression
@@ -127,6 +96,8 @@ class FrozenLiteralValue(FrozenExpression):
         return hash((self.value, self._term.variables))
     
 class AbstractSingleValueExpression(AbstractExpression):
+    __slots__ = ('value',)
+    
     def __init__(self, value):
         self.value = value
         self.term = EmptyExpression()
@@ -134,12 +105,21 @@ class AbstractSingleValueExpression(AbstractExpression):
     
 
 class EmptyExpression(AbstractExpression):
+    __slots__ = ()
+    _instance = None
+    
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance.term = None
+            cls._instance.rest_of_expression = None
+        return cls._instance
+    
     def __init__(self):
-        self.term = None
-        self.rest_of_expression = None
+        pass
 
     def copy(self):
-        return EmptyExpression()
+        return self
 
     def __iadd__(self, expr):
         return expr
@@ -164,6 +144,8 @@ class EmptyExpression(AbstractExpression):
 
 
 class Sum(AbstractExpression):
+    __slots__ = ()
+    
     def __init__(self, term, rest_of_expression):
         super().__init__(term, rest_of_expression)
         if isinstance(self.term, Sum):
@@ -210,6 +192,8 @@ class Sum(AbstractExpression):
 
 
 class Product(AbstractExpression):
+    __slots__ = ()
+    
     def __init__(self, term, rest_of_expression):
         super().__init__(term, rest_of_expression)
         if isinstance(self.term, Product):
@@ -259,6 +243,8 @@ class Product(AbstractExpression):
 
 
 class NumericValue(AbstractExpression):
+    __slots__ = ('value',)
+    
     def __init__(self, value):
         super().__init__(EmptyExpression(), EmptyExpression())
         self.value = value
@@ -294,6 +280,8 @@ class NumericValue(AbstractExpression):
 
 
 class LiteralValue(AbstractExpression):
+    __slots__ = ('value', 'variables')
+    
     def __init__(self, value, **variables):
         super().__init__(EmptyExpression(), EmptyExpression())
         self.value = value
@@ -321,25 +309,20 @@ class LiteralValue(AbstractExpression):
         return self
 
     def __neg__(self):
-        return LiteralValue(-self.value, **self.variables.copy())
+        return LiteralValue(-self.value, **self.variables)
 
     def copy(self):
-        return LiteralValue(self.value, **self.variables.copy())
+        return LiteralValue(self.value, **self.variables)
     
     @property
     def degree(self):
-        total = 0
-        for deg in self.variables.values():
-            total += deg
-        return total
+        return sum(self.variables.values())
     
     def __repr__(self):
         txt = str(self.value) * (self.value != 1 or self.degree == 0)
         for var_name, degree in self.variables.items():
             if degree not in {0, 1}:
-                degree_repr = str(degree)
-                degree_repr = degree_repr.replace('-', '⁻').replace('0', '⁰').replace('1', '¹').replace('2', '²').replace('3', '³').replace('4', '⁴').replace('5', '⁵')
-                degree_repr = degree_repr.replace('6', '⁶').replace('7', '⁷').replace('8', '⁸').replace('9', '⁹')
+                degree_repr = str(degree).translate(SUPERSCRIPTS)
             elif degree == 0:
                 degree_repr = ''
                 var_name = ''
@@ -0,0 +1,307 @@
+# -*- coding:Utf-8 -*-
+
+import os
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+from batch import worksheet_plot_directory
+from concurrent.futures import ThreadPoolExecutor
+from console import Console
+import argparse
+import asyncio
+import getpass
+import hmac
+import json
+import secrets
+import socket
+import sys
+import tempfile
+import time
+import uuid
+
+TOKEN_VARIABLE = 'MATH_KERNEL_TOKEN'
+
+
+def default_socket_path():
+    return os.path.join(tempfile.gettempdir(), f'math-kernel-{getpass.getuser()}.sock')
+
+
+class Kernel:
+    def __init__(self, plugins_path='plugins.txt', token=None):
+        # The first load imports the plugin modules: sessions created later only instantiate them.
+        start = time.perf_counter()
+        Console().load_plugins(plugins_path)
+        self.startup_time = time.perf_counter() - start
+        self.plugins_path = plugins_path
+        self.token = token
+
+        self.sessions = {}
+        self._locks = {}
+        # Lines of every session run on this single thread: plugins and matplotlib are never used concurrently.
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self.commands = {'run': self.run_command, 'reset': self.reset_command, 'close': self.close_command,
+                         'sessions': self.sessions_command, 'ping': self.ping_command}
+
+    def session(self, name):
+        if name not in self.sessions:
+            console = Console()
+            console.load_plugins(self.plugins_path)
+            self.sessions[name] = console
+            self._locks[name] = asyncio.Lock()
+        return self.sessions[name], self._locks[name]
+
+    async def handle_request(self, request):
+        command = request.get('command', 'run')
+        response = {'id': request.get('id'), 'session': request.get('session', 'default')}
+        if command not in self.commands:
+            response.update(status=-1, value=f'unknown command {command}, available commands: {", ".join(self.commands)}')
+            return response
+        try:
+            response.update(await self.commands[command](response['session'], request))
+        except Exception as error:
+            response.update(status=-1, value=f'{type(error).__name__}: {error}')
+        return response
+
+    async def _execute(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+    async def run_command(self, name, request):
+        console, lock = self.session(name)
+        async with lock:
+            start = time.perf_counter()
+            line, execution, value = await self._execute(_run_line, console, request['line'])
+            elapsed = time.perf_counter() - start
+        return {'line': line, 'status': execution, 'value': value, 'elapsed': elapsed}
+
+    async def reset_command(self, name, request):
+        # The options of a batch run travel with the reset that starts each worksheet.
+        console, lock = self.session(name)
+        async with lock:
+            errors = await self._execute(_reset, console, request)
+        return {'status': 0, 'value': errors}
+
+    async def close_command(self, name, request):
+        if name in self.sessions:
+            async with self._locks[name]:
+                del self.sessions[name]
+                del self._locks[name]
+        return {'status': 0, 'value': None}
+
+    async def sessions_command(self, name, request):
+        return {'status': 0, 'value': sorted(self.sessions)}
+
+    async def ping_command(self, name, request):
+        return {'status': 0, 'value': 'pong'}
+
+    async def handle_connection(self, reader, writer):
+        # Requests are newline-delimited JSON objects. A client may send several of them without waiting: they
+        # are answered in order, each response carrying the id of its request. With a token, the first request
+        # must be an auth command carrying it. The connection is closed on the first invalid request, so that
+        # nothing else (an HTTP request sent by a web page, for instance) gets its lines run.
+        authenticated = self.token is None
+        try:
+            while True:
+                try:
+                    data = await reader.readline()
+                except ValueError:
+                    break
+                if not data:
+                    break
+                try:
+                    request = json.loads(data)
+                    if not isinstance(request, dict):
+                        raise ValueError('a request must be a JSON object')
+                except ValueError as error:
+                    await _respond(writer, {'id': None, 'status': -1, 'value': f'invalid request: {error}'})
+                    break
+
+                if not authenticated:
+                    token = request.get('token')
+                    if (request.get('command') != 'auth' or not isinstance(token, str) or
+                            not hmac.compare_digest(token.encode('utf8'), self.token.encode('utf8'))):
+                        await _respond(writer, {'id': request.get('id'), 'status': -1, 'value': 'authentication failed'})
+                        break
+                    authenticated = True
+                    response = {'id': request.get('id'), 'status': 0, 'value': None}
+                else:
+                    response = await self.handle_request(request)
+                await _respond(writer, response)
+        finally:
+            writer.close()
+
+    async def serve(self, path=None, host='127.0.0.1', port=None):
+        # Without a port, the kernel listens on a Unix socket only its user can open. On TCP, any local process
+        # (or web page) can connect, so a token is required.
+        if port is None:
+            path = path or default_socket_path()
+            if os.path.exists(path):
+                os.remove(path)
+            umask = os.umask(0o177)
+            try:
+                server = await asyncio.start_unix_server(self.handle_connection, path)
+            finally:
+                os.umask(umask)
+            os.chmod(path, 0o600)
+        else:
+            if not self.token:
+                raise ValueError('a token is required to listen on TCP')
+            server = await asyncio.start_server(self.handle_connection, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+async def _respond(writer, response):
+    writer.write(json.dumps(response).encode('utf8') + b'\n')
+    await writer.drain()
+
+
+def _run_line(console, line):
+    line, execution, value = console.run_line(line)
+    if execution == 0 and value is not None:
+        value = console.format_value(value)
+    return line, execution, None if value is None else str(value)
+
+
+def _reset(console, request):
+    console.reset()
+    if request.get('max_terms') is not None:
+        console.max_displayed_terms = request['max_terms']
+    if request.get('plot_dir'):
+        console.set_plot_directory(request['plot_dir'])
+    if request.get('restore'):
+        return console.restore_snapshot(request['restore'])
+    return []
+
+
+def parse_address(address):
+    if ':' in address and os.path.sep not in address:
+        host, _, port = address.rpartition(':')
+        return None, host or '127.0.0.1', int(port)
+    return address, None, None
+
+
+class KernelClient:
+    def __init__(self, address=None, session=None, token=None):
+        path, host, port = parse_address(address or default_socket_path())
+        if path is not None:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.connect(path)
+        else:
+            self._socket = socket.create_connection((host, port))
+        self._file = self._socket.makefile('rwb')
+        self.session = session or f'client-{uuid.uuid4().hex}'
+        self._next_id = 0
+
+        token = token or os.environ.get(TOKEN_VARIABLE)
+        if token:
+            response = self.request('auth', token=token)
+            if response['status'] != 0:
+                self.close()
+                raise ConnectionError(response['value'])
+
+    def close(self):
+        self._file.close()
+        self._socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def send(self, command='run', **fields):
+        self._next_id += 1
+        request = dict(fields, id=self._next_id, command=command)
+        request.setdefault('session', self.session)
+        self._file.write(json.dumps(request).encode('utf8') + b'\n')
+        return self._next_id
+
+    def receive(self):
+        self._file.flush()
+        data = self._file.readline()
+        if not data:
+            raise ConnectionError('the kernel closed the connection')
+        return json.loads(data)
+
+    def request(self, command='run', **fields):
+        self.send(command, **fields)
+        return self.receive()
+
+    def run_lines(self, lines, window=64):
+        # Up to window requests are in flight at once, so neither side blocks on a full socket buffer.
+        responses = []
+        pending = 0
+        for line in lines:
+            if pending == window:
+                responses.append(self.receive())
+                pending -= 1
+            self.send('run', line=line)
+            pending += 1
+        responses.extend(self.receive() for _ in range(pending))
+        return responses
+
+    def run_line(self, line):
+        response = self.request('run', line=line)
+        return response['line'], response['status'], response['value']
+
+
+class RemoteRunner:
+    def __init__(self, address=None, token=None, plot_directory=None, snapshot_path=None, max_terms=None):
+        self.client = KernelClient(address, token=token)
+        self.plot_directory = plot_directory
+        self.restore_path = snapshot_path
+        self.max_terms = max_terms
+        self.plugin_load_times = {}
+
+    def run(self, lines, name='stdin'):
+        # Each worksheet gets a session of its own: clients running files with the same name do not share state.
+        self.client.session = f'{os.path.basename(name)}-{uuid.uuid4().hex}'
+        options = {'max_terms': self.max_terms}
+        if self.plot_directory is not None:
+            options['plot_dir'] = os.path.abspath(worksheet_plot_directory(self.plot_directory, name))
+        if self.restore_path is not None:
+            options['restore'] = os.path.abspath(self.restore_path)
+        for error in self.client.request('reset', **options)['value'] or ():
+            print(f'{name}: snapshot error: {error}', file=sys.stderr)
+        for line_number, base_line in enumerate(lines, 1):
+            base_line = base_line.rstrip('\n')
+            if not base_line.strip():
+                continue
+            start = time.perf_counter()
+            line, execution, value = self.client.run_line(base_line)
+            yield line_number, base_line, execution, value, time.perf_counter() - start
+        self.client.request('close')
+
+    def format_value(self, value):
+        return value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve a warm math-syntax interpreter to local clients.')
+    parser.add_argument('--socket', default=None, help=f'Unix socket path to listen on (default {default_socket_path()})')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen on with --port')
+    parser.add_argument('--port', type=int, default=None, help='listen on TCP instead of a Unix socket, a token is then required')
+    parser.add_argument('--token', default=None, help=f'token required from TCP clients (default ${TOKEN_VARIABLE}, or a random one)')
+    parser.add_argument('--plugins', default='plugins.txt', help='plugin list to load')
+    args = parser.parse_args(argv)
+
+    token = None
+    if args.port is not None:
+        token = args.token or os.environ.get(TOKEN_VARIABLE) or secrets.token_urlsafe(32)
+    kernel = Kernel(args.plugins, token)
+    socket_path = None if args.port is not None else args.socket or default_socket_path()
+    address = socket_path or f'{args.host}:{args.port}'
+    print(f'kernel ready on {address} in {kernel.startup_time * 1000:.1f} ms', file=sys.stderr)
+    if token is not None and not (args.token or os.environ.get(TOKEN_VARIABLE)):
+        print(f'clients must set {TOKEN_VARIABLE}={token}', file=sys.stderr)
+    try:
+        asyncio.run(kernel.serve(socket_path, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if socket_path is not None and os.path.exists(socket_path):
+            os.remove(socket_path)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
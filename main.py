@@ -2,18 +2,20 @@
 
 from PyQt5.QtWidgets import QShortcut
 from PyQt5.QtGui import QKeySequence
-from PyQt5 import QtWidgets, uic
-import plugins
-import re, sys
-import traceback
+from PyQt5 import QtCore, QtWidgets, uic
+from console import Console
+import os, re, sys
 
-class MainWindow(QtWidgets.QMainWindow):
-    def __init__(self):
-        super(MainWindow, self).__init__()
+class MainWindow(QtWidgets.QMainWindow, Console):
+    def __init__(self, snapshot_path=None):
+        QtWidgets.QMainWindow.__init__(self)
+        Console.__init__(self)
         uic.loadUi('main_window.ui', self)
         
-        self._plugins = {}
-        self._sequences = []
+        self._auto_snapshot = snapshot_path is not None
+        if snapshot_path is not None:
+            self.snapshot_path = snapshot_path
+        
         self._shortcuts = {}
         
         self.commands = {'insert_key': self.insert_key, 'execute_current_line': self.execute_current_line}
@@ -24,20 +26,28 @@ class MainWindow(QtWidgets.QMainWindow):
         self.action_raw_display.triggered.connect(lambda: setattr(self, '_raw_display', True))
         self.action_precompiled_display.triggered.connect(lambda: setattr(self, '_raw_display', False))
         
-        self.load_plugins()
-        
-        self._locals = {}
-        self._globals = {}
-        
         self._html_source = '''<!DOCTYPE HTML PUBLIC "-//W3C//DTD HTML 4.0//EN" "http://www.w3.org/TR/REC-html40/strict.dtd">
 <html><head><meta name="qrichtext" content="1" /><style type="text/css">
 p, li { white-space: pre; }
 </style></head><body style=" font-family:'MS Shell Dlg 2'; font-size:11pt; font-weight:400; font-style:normal;">
 <p style=" margin-top:12px; margin-bottom:12px; margin-left:0px; margin-right:0px; -qt-block-indent:0; text-indent:0px;">*TEXT*</p></body></html>'''
         self._additional_html_text = ''
-        self.display('> ', end='')
         
         self.show()
+        QtCore.QTimer.singleShot(0, self.start_console)
+    
+    def start_console(self):
+        self.load_plugins()
+        for name, elapsed in self.plugin_load_times.items():
+            self.display(f'{name} loaded in {elapsed * 1000:.1f} ms', color='#808080')
+        if self._auto_snapshot and os.path.exists(self.snapshot_path):
+            self.display(self.restore_command(''), color='#808080')
+        self.display('> ', end='')
+    
+    def closeEvent(self, event):
+        if self._auto_snapshot:
+            self.save_snapshot(self.snapshot_path)
+        super().closeEvent(event)
     
     def clear_console(self):
         self._additional_html_text = ''
@@ -45,8 +55,7 @@ p, li { white-space: pre; }
     
     def execute_current_line(self):
         base_line = self.line_edit.text()
-        line = self._precompile_line(base_line)
-        execution, value = self._execute_line(line)
+        line, execution, value = self.run_line(base_line)
         if self._raw_display:
             self.display(base_line)
         else:
@@ -54,10 +63,10 @@ p, li { white-space: pre; }
         if value is not None:
             if execution != 0:
                 self.display('Error: ', color='#fcba03', end='')
-                self.display(str(value), color='#fa6176')
+                self.display(str(value).replace('\n', '<br>'), color='#fa6176')
             else:
                 self.display('Out: ', color='#fcba03', end='')
-                self.display(str(value))
+                self.display(self.format_value(value).replace('\n', '<br>'))
                 
         self.display('> ', end='')
         
@@ -66,30 +75,6 @@ p, li { white-space: pre; }
         self.text_browser.setTextCursor(cursor)
         self.text_browser.ensureCursorVisible()
     
-    def load_plugins(self):
-        with open('plugins.txt') as file:
-            txt = file.read()
-            
-        for line in txt.splitlines():
-            if line and not line.startswith('//'):
-                self.add_plugin(line, plugins.get_plugin(line)())
-    
-    def _precompile_line(self, line):
-        for function in self._sequences:
-            line = function(line, self._locals, self._globals)
-        return line
-    
-    def _execute_line(self, line):
-        try:
-            try:
-                return 0, eval(line, self._globals, self._locals)
-            except SyntaxError:
-                pass
-            exec(line, self._globals, self._locals)
-            return 0, None
-        except Exception:
-            return -1, traceback.format_exc().replace('\n', '<br>')
-            
     def display(self, msg, color='#000000', end='<br>'):
         self._additional_html_text += f'<span style=" color: {color};">{msg}</span>{end}'
         self.text_browser.setHtml(self._html_source.replace('*TEXT*', self._additional_html_text))
@@ -99,18 +84,15 @@ p, li { white-space: pre; }
         shortcut.activated.connect(command)
         self._shortcuts[str_sequence] = shortcut
     
-    def add_sequence(self, function):
-        self._sequences.append(function)
-    
-    def add_plugin(self, name, plugin):
-        self._plugins[name] = plugin
-        plugin.add_to(self)
-        
     def insert_key(self, key):
         self.line_edit.insert(key)
         
 
 if __name__ == '__main__':
     app = QtWidgets.QApplication(sys.argv)
-    window = MainWindow()
+    snapshot_path = None
+    if '--snapshot' in sys.argv[1:]:
+        index = sys.argv.index('--snapshot')
+        snapshot_path = sys.argv[index + 1] if index + 1 < len(sys.argv) else Console.snapshot_path
+    window = MainWindow(snapshot_path)
     app.exec_()
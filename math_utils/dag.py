@@ -0,0 +1,165 @@
+# -*- coding:Utf-8 -*-
+
+
+from . import expressions as mexpr
+from typing import Any, Dict, List, Tuple
+
+
+class ExpressionDAG:
+    def __init__(self) -> None:
+        self._keys: Dict[tuple, int] = {}
+        self._objects: Dict[int, Tuple[Any, int]] = {}
+        self._kinds: List[str] = []
+        self._payloads: List[Any] = []
+        self._children: List[tuple] = []
+        self._parents: List[int] = []
+        self._developed: Dict[int, dict] = {}
+        self._rendered: Dict[int, str] = {}
+        self._degrees: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._kinds)
+
+    def add(self, expression: mexpr.TermOrExpression) -> int:
+        cached = self._objects.get(id(expression))
+        if cached is not None:
+            return cached[1]
+
+        if isinstance(expression, mexpr.Term):
+            node = self._intern('term', expression.multiplier, expression.variables, ())
+        elif isinstance(expression, mexpr.ExpressionMultiplicationTerm):
+            children = tuple(sorted((self.add(expression.expr_1), self.add(expression.expr_2))))
+            node = self._intern('product', expression.multiplier, None, children)
+        elif isinstance(expression, mexpr.Expression):
+            children = tuple(sorted(self.add(node.term) for node in expression._iter_nodes()))
+            if len(children) == 1:
+                node = children[0]
+            else:
+                node = self._intern('sum', 1, None, children)
+        elif isinstance(expression, mexpr.AbstractTerm):
+            node = self.add(expression.develop())
+        else:
+            raise TypeError(f'cannot add {type(expression).__name__} to an expression DAG')
+
+        self._objects[id(expression)] = (expression, node)
+        return node
+
+    def _intern(self, kind: str, multiplier: Any, variables: Any, children: tuple) -> int:
+        key = (kind, multiplier, variables, children)
+        node = self._keys.get(key)
+        if node is not None:
+            return node
+
+        node = len(self._kinds)
+        self._keys[key] = node
+        self._kinds.append(kind)
+        self._payloads.append((multiplier, variables))
+        self._children.append(children)
+        self._parents.append(0)
+        for child in children:
+            self._parents[child] += 1
+        return node
+
+    def shared_nodes(self) -> List[int]:
+        return [node for node, parents in enumerate(self._parents) if parents > 1]
+
+    def _reachable(self, root: int) -> List[int]:
+        seen = {root}
+        stack = [root]
+        while stack:
+            for child in self._children[stack.pop()]:
+                if child not in seen:
+                    seen.add(child)
+                    stack.append(child)
+        return sorted(seen)
+
+    def develop(self, root: int) -> mexpr.AbstractExpression:
+        for node in self._reachable(root):
+            if node in self._developed:
+                continue
+            kind = self._kinds[node]
+            multiplier, variables = self._payloads[node]
+
+            if kind == 'term':
+                monomials = {variables: multiplier} if multiplier != 0 else {}
+            elif kind == 'sum':
+                monomials = {}
+                for child in self._children[node]:
+                    for variables, coefficient in self._developed[child].items():
+                        monomials[variables] = monomials.get(variables, 0) + coefficient
+            else:
+                first, second = (self._developed[child] for child in self._children[node])
+                monomials = {}
+                for variables_1, coefficient_1 in first.items():
+                    for variables_2, coefficient_2 in second.items():
+                        variables = variables_1 + variables_2
+                        monomials[variables] = monomials.get(variables, 0) + multiplier * coefficient_1 * coefficient_2
+            self._developed[node] = {variables: coefficient for variables, coefficient in monomials.items() if coefficient != 0}
+
+        return mexpr.Expression.from_terms([mexpr.Term.from_variables(coefficient, variables)
+                                            for variables, coefficient in self._developed[root].items()])
+
+    def evaluate(self, root: int, **values: Any) -> Any:
+        results: Dict[int, Any] = {}
+        for node in self._reachable(root):
+            kind = self._kinds[node]
+            multiplier, variables = self._payloads[node]
+
+            if kind == 'term':
+                result = multiplier
+                for name, exponent in variables.items():
+                    result = result * values[name] ** exponent
+            elif kind == 'sum':
+                result = 0
+                for child in self._children[node]:
+                    result = result + results[child]
+            else:
+                first, second = self._children[node]
+                result = multiplier * results[first] * results[second]
+            results[node] = result
+        return results[root]
+
+    def degree(self, root: int) -> int:
+        for node in self._reachable(root):
+            if node in self._degrees:
+                continue
+            kind = self._kinds[node]
+            if kind == 'term':
+                self._degrees[node] = sum(self._payloads[node][1].values())
+            elif kind == 'sum':
+                self._degrees[node] = max(self._degrees[child] for child in self._children[node])
+            else:
+                self._degrees[node] = sum(self._degrees[child] for child in self._children[node])
+        return self._degrees[root]
+
+    def render(self, root: int) -> str:
+        self.degree(root)
+        for node in self._reachable(root):
+            if node in self._rendered:
+                continue
+            kind = self._kinds[node]
+            multiplier, variables = self._payloads[node]
+
+            if kind == 'term':
+                txt = repr(mexpr.Term.from_variables(multiplier, variables))
+            elif kind == 'sum':
+                children = sorted(self._children[node], key=lambda child: -self._degrees[child])
+                txt = self._rendered[children[0]]
+                for child in children[1:]:
+                    child_multiplier, child_variables = self._payloads[child]
+                    if self._kinds[child] == 'term' and child_multiplier < 0:
+                        txt += f' - {mexpr.Term.from_variables(-child_multiplier, child_variables)}'
+                    else:
+                        txt += f' + {self._rendered[child]}'
+            else:
+                first, second = (self._rendered[child] for child in self._children[node])
+                txt = f'({first})({second})'
+                if multiplier != 1:
+                    txt = f'{multiplier}{txt}'
+            self._rendered[node] = txt
+        return self._rendered[root]
+
+
+def develop_shared(expression: mexpr.TermOrExpression) -> mexpr.AbstractExpression:
+    dag = ExpressionDAG()
+    return dag.develop(dag.add(expression))
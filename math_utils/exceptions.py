@@ -1,4 +1,5 @@
 # -*- coding:Utf-8 -*-
 
 
-
+class SerializationError(ValueError):
+    pass
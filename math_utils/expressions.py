@@ -1,41 +1,137 @@
 # -*- coding:Utf-8 -*-
 
-from collections import UserDict
-from typing import Any, Union, Sequence, Mapping, Set, AbstractSet
+from collections import Counter
+from collections.abc import KeysView
+from typing import Any, Union, Sequence, Mapping, Set, AbstractSet, Iterator, Optional
+from operator import add, itemgetter
+from fractions import Fraction
 from .math_sets import NATURAL
+import heapq
 
+SUPERSCRIPTS = str.maketrans('-0123456789', '⁻⁰¹²³⁴⁵⁶⁷⁸⁹')
 
-class Variables(UserDict):
-    def __missing__(self, _: Any) -> int:
-        return 0
+
+class Variables(Mapping):
+    # Monomials (all exponents ints) are interned: equal monomials share one instance, so a term only costs its own
+    # object and multiplier. The cache is emptied when it reaches cache_size entries, instances stay valid. The
+    # variables of products and powers hold mutable expressions and are never interned.
+    __slots__ = ('_names', '_exponents')
+    _names_cache: dict = {}
+    _cache: dict = {}
+    cache_size = 1 << 16
+    
+    def __new__(cls, variables: Any = (), **kwargs: int) -> 'Variables':
+        items = sorted((item for item in dict(variables, **kwargs).items() if item[1] != 0), key=itemgetter(0))
+        names = tuple(name for name, _ in items)
+        exponents = tuple(exponent for _, exponent in items)
+        if all(type(exponent) is int for exponent in exponents):
+            return cls.from_tuples(names, exponents)
+        return cls._create(names, exponents)
+    
+    @classmethod
+    def _create(cls, names: tuple, exponents: tuple) -> 'Variables':
+        variables = object.__new__(cls)
+        variables._names = cls._names_cache.setdefault(names, names)
+        variables._exponents = exponents
+        return variables
+    
+    @classmethod
+    def from_tuples(cls, names: tuple, exponents: tuple) -> 'Variables':
+        # exponents must be ints.
+        key = (names, exponents)
+        cache = cls._cache
+        try:
+            return cache[key]
+        except KeyError:
+            pass
+        variables = cls._create(names, exponents)
+        if len(cache) >= cls.cache_size:
+            cache.clear()
+        cache[key] = variables
+        return variables
     
-    def __setitem__(self, key: Any, value: int) -> None:
-        if value == 0:
-            if key in self:
-                self.pop(key)
-        else:
-            super().__setitem__(key, value)
+    @property
+    def names(self) -> tuple:
+        return self._names
+    
+    @property
+    def exponents(self) -> tuple:
+        return self._exponents
+    
+    def __getitem__(self, key: Any) -> Any:
+        try:
+            return self._exponents[self._names.index(key)]
+        except ValueError:
+            return 0
+    
+    def get(self, key: Any, default: Any = None) -> Any:
+        if key in self._names:
+            return self[key]
+        return default
+    
+    def __contains__(self, key: Any) -> bool:
+        return key in self._names
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._names)
+    
+    def __len__(self) -> int:
+        return len(self._names)
+    
+    def keys(self) -> AbstractSet[str]:
+        return KeysView(self)
+    
+    def values(self) -> tuple:
+        return self._exponents
+    
+    def items(self) -> Iterator[tuple]:
+        return zip(self._names, self._exponents)
     
     def __eq__(self, other_dict: Any) -> bool:
         if not isinstance(other_dict, Variables):
             try:
                 other_dict = Variables(other_dict)
-            except TypeError:
+            except (TypeError, ValueError):
                 return NotImplemented
-            
-        for key in self.keys() | other_dict.keys():
-            if self[key] != other_dict[key]:
-                return False
-            
-        return True
+        return self._names == other_dict._names and self._exponents == other_dict._exponents
+    
+    def __hash__(self) -> int:
+        return hash((self._names, self._exponents))
+    
+    def __add__(self, other_dict: Any) -> 'Variables':
+        if not isinstance(other_dict, Variables):
+            return NotImplemented
+        if self._names == other_dict._names:
+            exponents = tuple(map(add, self._exponents, other_dict._exponents))
+            if 0 not in exponents:
+                return Variables.from_tuples(self._names, exponents)
+        total = dict(self.items())
+        for name, exponent in other_dict.items():
+            total[name] = total.get(name, 0) + exponent
+        return Variables(total)
+    
+    def updated(self, name: str, exponent: int) -> 'Variables':
+        variables = dict(self.items())
+        variables[name] = exponent
+        return Variables(variables)
+    
+    def __reduce__(self) -> tuple:
+        return Variables, (dict(self.items()),)
+    
+    def __repr__(self) -> str:
+        return f'Variables({dict(self.items())})'
+    
+    def copy(self) -> 'Variables':
+        return self
     
     def length_without_null_values(self) -> int:
-        return len(list(v for v in self.values() if v != 0))
+        return len(self._names)
 
 Map = Union[Mapping, Variables]
 
 
 class AbstractTerm:
+    __slots__ = ('_variables', 'multiplier')
     
     def __init__(self) -> None:
         self._variables: Map = {}
@@ -48,12 +144,37 @@ class AbstractTerm:
     def __sub__(self, value): raise NotImplementedError
     def __mul__(self, value): raise NotImplementedError
     def __rmul__(self, value): raise NotImplementedError
+    def __pow__(self, value): raise NotImplementedError
     def is_null(self): raise NotImplementedError
-    def develop(self): raise NotImplementedError
+    def develop(self, max_degree=None): raise NotImplementedError
+    def derive(self, variable, develop=False): raise NotImplementedError
+    def integrate(self, variable): raise NotImplementedError
     def is_polynom_term(self) -> bool: return False
     @property
     def variable_names(self): raise NotImplementedError
     
+    def _structural_key(self) -> Any:
+        return id(self)
+    
+    def _structural_hash(self) -> int:
+        return hash(self._structural_key())
+    
+    def subs(self, values: Optional[Mapping[str, Any]] = None, **kwargs: Any) -> 'TermOrExpression':
+        return substitution.substitute(self, dict(values or {}, **kwargs))
+    
+    def substitution_plan(self, *names: str) -> Any:
+        return substitution.SubstitutionPlan(self, names or None)
+    
+    def iter_terms(self) -> Iterator['AbstractTerm']:
+        yield self
+    
+    def iter_develop(self, max_degree: Optional[int] = None, degree: Optional[int] = None,
+                     ascending: Optional[bool] = None) -> Iterator['AbstractTerm']:
+        return streaming.iter_develop(self, max_degree, degree, ascending)
+    
+    def factor(self) -> 'TermOrExpression':
+        return factorization.factor(self)
+    
     @property
     def variables(self) -> Map:
         return self._variables
@@ -67,12 +188,14 @@ class AbstractTerm:
     
 
 class AbstractExpression:
+    __slots__ = ()
     remove_null_values_when_repr = True
     term: AbstractTerm
     @property
     def degree(self): raise NotImplementedError
     def __imul__(self, value): raise NotImplementedError
     def __mul__(self, value): raise NotImplementedError
+    def __pow__(self, value): raise NotImplementedError
     def copy(self): raise NotImplementedError
     def __iadd__(self, value) -> Any: raise NotImplementedError
     def __add__(self, value) -> Any: raise NotImplementedError
@@ -80,37 +203,100 @@ class AbstractExpression:
     def __sub__(self, value): raise NotImplementedError
     def __neg__(self): raise NotImplementedError
     def get_all_terms(self): raise NotImplementedError
+    def iter_terms(self): raise NotImplementedError
     def remove_null_values(self): raise NotImplementedError
     def __eq__(self, expr): raise NotImplementedError
     def is_null(self): raise NotImplementedError
-    def develop(self): raise NotImplementedError
+    def develop(self, max_degree=None): raise NotImplementedError
+    def derive(self, variable, develop=False): raise NotImplementedError
+    def integrate(self, variable): raise NotImplementedError
     @property
     def variable_names(self): raise NotImplementedError
     def is_polynom(self) -> bool: return False
+    
+    def _structural_key(self) -> Any:
+        return id(self)
+    
+    def _structural_hash(self) -> int:
+        return hash(self._structural_key())
+    
+    def subs(self, values: Optional[Mapping[str, Any]] = None, **kwargs: Any) -> 'TermOrExpression':
+        return substitution.substitute(self, dict(values or {}, **kwargs))
+    
+    def substitution_plan(self, *names: str) -> Any:
+        return substitution.SubstitutionPlan(self, names or None)
+    
+    def iter_develop(self, max_degree: Optional[int] = None, degree: Optional[int] = None,
+                     ascending: Optional[bool] = None) -> Iterator[AbstractTerm]:
+        return streaming.iter_develop(self, max_degree, degree, ascending)
+    
+    def factor(self) -> 'TermOrExpression':
+        return factorization.factor(self)
 
 
 TermOrExpression = Union[AbstractTerm, AbstractExpression]
 
+
+def divide(multiplier: Any, divisor: int) -> Any:
+    if isinstance(multiplier, int):
+        if multiplier % divisor == 0:
+            return multiplier // divisor
+        return Fraction(multiplier, divisor)
+    return multiplier / divisor
+
+
+def _term_hash(term: AbstractTerm) -> int:
+    return 0 if term.is_null() else term._structural_hash()
+
+
+def _link(expression: AbstractExpression) -> None:
+    if isinstance(expression, Expression):
+        expression._linked = True
+
+
+def _check_exponent(exponent: Any) -> bool:
+    if not isinstance(exponent, int) or isinstance(exponent, bool):
+        return False
+    if exponent < 0:
+        raise ValueError('only non-negative integer exponents are supported')
+    return True
+
+
+def _develop_truncated(expression: TermOrExpression, max_degree: int) -> TermOrExpression:
+    return _single_term_or_expression(list(streaming.iter_develop(expression, max_degree)))
+
+
+def _single_term_or_expression(terms: Sequence[AbstractTerm]) -> TermOrExpression:
+    if not terms:
+        return Term(0)
+    if len(terms) == 1:
+        return terms[0]
+    return Expression.from_terms(terms)
+
+
 class Term(AbstractTerm):
+    __slots__ = ()
+    
     def __init__(self, multiplier: int, **variables) -> None:
-        super().__init__()
         self.multiplier = multiplier
-        self.variables = variables
+        self._variables = Variables(variables)
+    
+    @classmethod
+    def from_variables(cls, multiplier: int, variables: Variables) -> AbstractTerm:
+        term = object.__new__(cls)
+        term.multiplier = multiplier
+        term._variables = variables
+        return term
         
     @property
     def degree(self) -> int:
-        total = 0
-        for deg in self.variables.values():
-            total += deg
-        return total
+        return sum(self._variables._exponents)
     
     def __repr__(self) -> str:
         txt = str(self.multiplier) * (self.multiplier != 1 or self.degree == 0)
         for var_name, degree in self.variables.items():
             if degree not in {0, 1}:
-                degree_repr = str(degree)
-                degree_repr = degree_repr.replace('-', '⁻').replace('0', '⁰').replace('1', '¹').replace('2', '²').replace('3', '³').replace('4', '⁴').replace('5', '⁵')
-                degree_repr = degree_repr.replace('6', '⁶').replace('7', '⁷').replace('8', '⁸').replace('9', '⁹')
+                degree_repr = str(degree).translate(SUPERSCRIPTS)
             elif degree == 0:
                 degree_repr = ''
                 var_name = ''
@@ -124,21 +310,21 @@ class Term(AbstractTerm):
             return value + self
         elif isinstance(value, AbstractTerm):
             if value.variables == self.variables:
-                return Term(self.multiplier + value.multiplier, **self.variables)
+                return Term.from_variables(self.multiplier + value.multiplier, self.variables)
             else:
                 return Expression(self) + value
         else:
             return NotImplemented
     
     def __neg__(self) -> AbstractTerm:
-        return Term(-self.multiplier, **self.variables)
+        return Term.from_variables(-self.multiplier, self.variables)
     
     def __sub__(self, value: TermOrExpression) -> TermOrExpression:
         return self + (-value)
     
     def __mul__(self, value: Union[TermOrExpression, int]) -> AbstractTerm:
         if isinstance(value, int):
-            return Term(self.multiplier * value, **self.variables)
+            return Term.from_variables(self.multiplier * value, self.variables)
         elif isinstance(value, AbstractExpression):
             return TermExpressionMultiplicationTerm(Expression(self, None), value)
         elif isinstance(value, AbstractTerm):
@@ -149,30 +335,100 @@ class Term(AbstractTerm):
     def __rmul__(self, value: Union[TermOrExpression, int]) -> AbstractTerm:
         return self * value
     
+    def __pow__(self, exponent: int) -> AbstractTerm:
+        if not _check_exponent(exponent):
+            return NotImplemented
+        if exponent == 0:
+            return Term(1)
+        variables = self.variables
+        return Term.from_variables(self.multiplier ** exponent,
+                                   Variables.from_tuples(variables.names, tuple([value * exponent for value in variables.exponents])))
+    
     def is_null(self) -> bool:
         return self.multiplier == 0
     
-    def develop(self) -> AbstractTerm:
+    def develop(self, max_degree: Optional[int] = None) -> AbstractTerm:
+        if max_degree is not None and self.degree > max_degree:
+            return Term(0)
         return self
     
+    def derive(self, variable: str, develop: bool = False) -> AbstractTerm:
+        exponent = self.variables[variable]
+        if exponent == 0:
+            return Term(0)
+        return Term.from_variables(self.multiplier * exponent, self.variables.updated(variable, exponent - 1))
+    
+    def integrate(self, variable: str) -> AbstractTerm:
+        exponent = self.variables[variable]
+        if exponent == -1:
+            raise ValueError(f'cannot integrate {variable}⁻¹ as a term')
+        return Term.from_variables(divide(self.multiplier, exponent + 1), self.variables.updated(variable, exponent + 1))
+    
     @property
     def variable_names(self) -> Union[AbstractSet[str], Sequence[str]]:
         return self.variables.keys()
     
     def is_polynom_term(self) -> bool:
         return self.degree in NATURAL and self.variables.length_without_null_values() <= 1
+    
+    def _structural_key(self) -> Any:
+        return self.multiplier, self._variables
 
 
 class Expression(AbstractExpression):
+    # Each node caches the structural hash and the count of non-null terms of the chain starting at it. A cache is
+    # valid while its stamp equals _epoch: += and *= update the caches of the nodes they walk through, and a
+    # mutation starting on a linked node (the tail of another node or the operand of a product or a power) bumps
+    # _epoch, since the nodes pointing to it cannot be reached.
+    __slots__ = ('term', 'rest_of_expression', '_repr_cache', '_hash', '_count', '_stamp', '_linked')
+    _epoch = 0
+    
     def __init__(self, term: AbstractTerm, rest_of_expression: Union[None, AbstractExpression] = None):
         self.term = term
         self.rest_of_expression = rest_of_expression
+        self._repr_cache: Optional[tuple] = None
+        self._stamp = -1
+        self._linked = False
+        if rest_of_expression is not None:
+            _link(rest_of_expression)
+    
+    def __getstate__(self) -> dict:
+        # The cached hash, repr and their stamp depend on this process (_epoch, string hash seed): they are dropped.
+        return {'term': self.term, 'rest_of_expression': self.rest_of_expression, '_linked': self._linked}
+    
+    def __setstate__(self, state: dict) -> None:
+        for name, value in state.items():
+            setattr(self, name, value)
+        self._repr_cache = None
+        self._hash = self._count = None
+        self._stamp = -1
+    
+    @classmethod
+    def from_terms(cls, terms: Sequence[AbstractTerm]) -> AbstractExpression:
+        expression = None
+        for term in reversed(terms):
+            expression = cls(term, expression)
+        if expression is None:
+            return cls(Term(0), None)
+        return expression
     
     def __imul__(self, value: Union[TermOrExpression, int]) -> AbstractExpression:
         if isinstance(value, int):
-            self.term *= value
-            if self.rest_of_expression is not None:
-                self.rest_of_expression *= value
+            if self._linked:
+                Expression._epoch += 1
+            epoch = Expression._epoch
+            valid = self._stamp == epoch
+            total = count = 0
+            for node in self._iter_nodes():
+                node._repr_cache = None
+                node._stamp = -1
+                node.term *= value
+                if valid:
+                    term_hash = _term_hash(node.term)
+                    total += term_hash
+                    count += not node.term.is_null()
+            if valid:
+                self._hash, self._count, self._stamp = total, count, epoch
         elif isinstance(value, AbstractExpression):
             term = ExpressionMultiplicationTerm(self, value)
             expression = Expression(term, None)
@@ -188,28 +444,49 @@ class Expression(AbstractExpression):
         new_expression *= value
         return new_expression
         
+    def __pow__(self, exponent: int) -> AbstractExpression:
+        if not _check_exponent(exponent):
+            return NotImplemented
+        return Expression(ExpressionPowerTerm(self.copy(), exponent))
+        
     def copy(self) -> AbstractExpression:
-        if self.rest_of_expression is None:
-            return Expression(self.term, None)
-        else:
-            return Expression(self.term, self.rest_of_expression.copy())
+        return Expression.from_terms([node.term for node in self._iter_nodes()])
         
     def __iadd__(self, value: TermOrExpression) -> Any:
         if isinstance(value, AbstractTerm):
-            if self.term.variables == value.variables:
-                self.term += value
-            else:
-                if self.rest_of_expression is None:
-                    self.rest_of_expression = Expression(value)
-                else:
-                    self.rest_of_expression += value
-                    
+            self._add_term(value)
         elif isinstance(value, AbstractExpression):
             for term in value.get_all_terms():
-                self += term
+                self._add_term(term)
         else:
             return NotImplemented
         return self
+    
+    def _add_term(self, value: AbstractTerm) -> None:
+        if self._linked:
+            Expression._epoch += 1
+        epoch = Expression._epoch
+        cached = []
+        node = self
+        while True:
+            node._repr_cache = None
+            if node._stamp == epoch:
+                cached.append(node)
+            if node.term.variables == value.variables:
+                old_term = node.term
+                node.term = old_term + value
+                hash_delta = _term_hash(node.term) - _term_hash(old_term)
+                count_delta = old_term.is_null() - node.term.is_null()
+                break
+            if node.rest_of_expression is None:
+                node.rest_of_expression = Expression(value)
+                hash_delta = _term_hash(value)
+                count_delta = not value.is_null()
+                break
+            node = node.rest_of_expression
+        for node in cached:
+            node._hash += hash_delta
+            node._count += count_delta
         
     def __add__(self, value: TermOrExpression) -> AbstractExpression:
         new_expression = self.copy()
@@ -228,33 +505,63 @@ class Expression(AbstractExpression):
     def __neg__(self) -> AbstractExpression:
         return self * -1
     
+    def _iter_nodes(self) -> Iterator[AbstractExpression]:
+        node = self
+        while node is not None:
+            yield node
+            node = node.rest_of_expression
+    
     def get_all_terms(self) -> Set[AbstractTerm]:
-        terms = {self.term}
-        if self.rest_of_expression is None:
-            return terms
-        else:
-            return terms | self.rest_of_expression.get_all_terms()
+        return {node.term for node in self._iter_nodes()}
+    
+    def iter_terms(self) -> Iterator[AbstractTerm]:
+        for node in self._iter_nodes():
+            yield node.term
         
-    def __repr__(self) -> str:
+    def iter_repr(self, max_terms: Optional[int] = None) -> Iterator[str]:
+        terms = [node.term for node in self._iter_nodes()]
         if self.remove_null_values_when_repr:
-            expr = self.remove_null_values()
-            if expr is None:
-                return '0'
+            terms = [term for term in terms if not term.is_null()]
+            if not terms:
+                yield '0'
+                return
+        
+        if max_terms is None or max_terms >= len(terms):
+            shown_terms = reversed(sorted(terms, key=lambda m: m.degree))
         else:
-            expr = self
-        terms = sorted(expr.get_all_terms(), key=lambda m: m.degree)
-
-        txt = str(terms.pop())
-        for term in reversed(terms):
-            if term.multiplier < 0:
-                txt += f' - {-term}'
+            indexed_terms = ((term.degree, i, term) for i, term in enumerate(terms))
+            shown_terms = (term for _, _, term in heapq.nlargest(max_terms, indexed_terms, key=lambda item: item[:2]))
+            
+        for i, term in enumerate(shown_terms):
+            if i == 0:
+                yield str(term)
+            elif term.multiplier < 0:
+                yield f' - {-term}'
             else:
-                txt += f' + {term}'
+                yield f' + {term}'
+        
+        if max_terms is not None and max_terms < len(terms):
+            yield f' … {len(terms) - max_terms:,} more terms'
+    
+    def render(self, max_terms: Optional[int] = None) -> str:
+        if max_terms is not None:
+            return ''.join(self.iter_repr(max_terms))
+        return repr(self)
+    
+    def __repr__(self) -> str:
+        # Like the structural hash, the cached text is stamped with _epoch so that a mutation through a shared tail,
+        # which does not walk through this node, invalidates it.
+        key = (Expression._epoch, self.remove_null_values_when_repr)
+        if self._repr_cache is not None and self._repr_cache[0] == key:
+            return self._repr_cache[1]
         
+        txt = ''.join(self.iter_repr())
+        if all(isinstance(node.term, Term) for node in self._iter_nodes()):
+            self._repr_cache = (key, txt)
         return txt
     
     def is_null(self) -> bool:
-        return self.remove_null_values() is None
+        return all(node.term.is_null() for node in self._iter_nodes())
     
     def remove_null_values(self) -> Union[None, AbstractExpression]:
         if self.term.is_null():
@@ -270,43 +577,112 @@ class Expression(AbstractExpression):
     
     @property
     def degree(self) -> int:
-        if self.rest_of_expression is not None:
-            return max(self.rest_of_expression.degree, self.term.degree)
-        else:
-            return self.term.degree
+        return max(node.term.degree for node in self._iter_nodes())
+    
+    def _structure(self) -> tuple:
+        epoch = Expression._epoch
+        if self._stamp != epoch:
+            total = count = 0
+            for node in self._iter_nodes():
+                total += _term_hash(node.term)
+                count += not node.term.is_null()
+            self._hash, self._count, self._stamp = total, count, epoch
+        return self._hash, self._count
+    
+    @property
+    def term_count(self) -> int:
+        return self._structure()[1]
+    
+    def _structural_key(self) -> Any:
+        return frozenset(Counter(node.term._structural_key() for node in self._iter_nodes()
+                                 if not node.term.is_null()).items())
+    
+    def _structural_hash(self) -> int:
+        return hash(self._structure())
+    
+    def __hash__(self) -> int:
+        return hash(self._structure())
     
     def __eq__(self, expr: object) -> bool:
+        if self is expr:
+            return True
+        if isinstance(expr, Expression):
+            if self._structure() != expr._structure():
+                return False
+            return self._structural_key() == expr._structural_key()
         if isinstance(expr, AbstractExpression):
             return self.get_all_terms() == expr.get_all_terms()
         return False
     
-    def develop(self) -> AbstractExpression:
+    def develop(self, max_degree: Optional[int] = None) -> TermOrExpression:
+        if max_degree is not None:
+            return _develop_truncated(self, max_degree)
         if self.rest_of_expression is None:
             return self.term.develop()
-        else:
-            return self.term.develop() + self.rest_of_expression.develop()
+        
+        monomials = {}
+        for node in self._iter_nodes():
+            developed = node.term.develop()
+            if isinstance(developed, AbstractExpression):
+                terms = [developed_node.term for developed_node in developed._iter_nodes()]
+            else:
+                terms = [developed]
+            for term in terms:
+                monomials[term.variables] = monomials.get(term.variables, 0) + term.multiplier
+        return _single_term_or_expression([Term.from_variables(multiplier, variables)
+                                           for variables, multiplier in monomials.items() if multiplier != 0])
+    
+    def derive(self, variable: str, develop: bool = False) -> AbstractExpression:
+        return self._map_terms(variable, polynoms.derive_coefficients, 'derive', develop=develop)
+    
+    def integrate(self, variable: str) -> AbstractExpression:
+        return self._map_terms(variable, polynoms.integrate_coefficients, 'integrate')
+    
+    def _map_terms(self, variable: str, coefficients_function: Any, method_name: str, **kwargs: Any) -> AbstractExpression:
+        coefficients = polynoms.to_coefficients(self, variable)
+        if coefficients is not None:
+            return polynoms.from_coefficients(coefficients_function(coefficients), variable)
+        
+        terms = []
+        expression = None
+        for node in self._iter_nodes():
+            result = getattr(node.term, method_name)(variable, **kwargs)
+            if isinstance(result, Term):
+                if not result.is_null():
+                    terms.append(result)
+            elif expression is None:
+                expression = result
+            else:
+                expression += result
+                
+        if expression is None:
+            return Expression.from_terms(terms)
+        for term in terms:
+            expression += term
+        return expression
     
     @property
     def variable_names(self) -> Sequence[str]:
-        if self.rest_of_expression is None:
-            return self.term.variable_names
-        else:
-            return self.term.variable_names | self.rest_of_expression.variable_names
+        names = set()
+        for node in self._iter_nodes():
+            names |= node.term.variable_names
+        return names
         
     def is_polynom(self) -> bool:
-        if self.rest_of_expression is None:
-            return self.term.is_polynom_term()
-        else:
-            return self.term.is_polynom_term() and self.rest_of_expression.is_polynom()
+        return all(node.term.is_polynom_term() for node in self._iter_nodes())
     
     
 class ExpressionMultiplicationTerm(AbstractTerm):
+    __slots__ = ('expr_1', 'expr_2')
+    
     def __init__(self, expr_1: AbstractExpression, expr_2: AbstractExpression, multiplier: int = 1):
         super().__init__()
         self.expr_1 = expr_1
         self.expr_2 = expr_2
         self.multiplier = multiplier
         self.variables: Map = {'expr_1': self.expr_1, 'expr_2': self.expr_2}
+        _link(expr_1)
+        _link(expr_2)
         
     @property
     def degree(self) -> int:
@@ -343,6 +719,11 @@ class ExpressionMultiplicationTerm(AbstractTerm):
     def __rmul__(self, value: Union[TermOrExpression, int]) -> AbstractTerm:
         return self * value
     
+    def __pow__(self, exponent: int) -> AbstractTerm:
+        if not _check_exponent(exponent):
+            return NotImplemented
+        return ExpressionPowerTerm(Expression(self), exponent)
+    
     def is_null(self) -> bool:
         return self.multiplier == 0 or self.expr_1.is_null() or self.expr_2.is_null()
     
@@ -352,17 +733,20 @@ class ExpressionMultiplicationTerm(AbstractTerm):
         else:
             return f'({self.expr_1})({self.expr_2})'
     
-    def develop(self) -> Union[None, TermOrExpression]:
-        terms = self.expr_1.get_all_terms()
-        expression = None
-        for term in terms:
-            if expression is None:
-                expression = self.expr_2 * term
-            else:
-                expression += self.expr_2 * term
-        if expression is None:
-            raise ValueError("terms' length must be higher than 0")
-        return expression.develop()
+    def develop(self, max_degree: Optional[int] = None) -> TermOrExpression:
+        if max_degree is not None:
+            return _develop_truncated(self, max_degree)
+        return _single_term_or_expression(sparse.multiply_terms(self.expr_1.develop(), self.expr_2.develop(), self.multiplier))
+    
+    def derive(self, variable: str, develop: bool = False) -> TermOrExpression:
+        derivative = Expression(type(self)(self.expr_1.derive(variable, develop), self.expr_2, self.multiplier),
+                                Expression(type(self)(self.expr_1, self.expr_2.derive(variable, develop), self.multiplier)))
+        if develop:
+            return derivative.develop()
+        return derivative
+    
+    def integrate(self, variable: str) -> TermOrExpression:
+        return self.develop().integrate(variable)
     
     @property
     def variable_names(self) -> Sequence[str]:
@@ -370,41 +754,122 @@ class ExpressionMultiplicationTerm(AbstractTerm):
     
     def is_polynom_term(self) -> bool:
         return self.expr_1.is_polynom() and self.expr_2.is_polynom()
+    
+    def _structural_key(self) -> Any:
+        return 'product', self.multiplier, frozenset(Counter((self.expr_1._structural_key(),
+                                                               self.expr_2._structural_key())).items())
+    
+    def _structural_hash(self) -> int:
+        hash_1, hash_2 = self.expr_1._structural_hash(), self.expr_2._structural_hash()
+        return hash(('product', self.multiplier, min(hash_1, hash_2), max(hash_1, hash_2)))
 
 
 class TermExpressionMultiplicationTerm(ExpressionMultiplicationTerm):
-    def develop(self) -> Union[None, TermOrExpression]:
-        factor = self.expr_1.term
-        terms = self.expr_2.get_all_terms()
-        expression = None
-        for term in terms:
-                
-            if expression is None:
-                expression = factor * term
-            else:
-                expression += factor * term
-        if expression is None:
-            raise ValueError("terms' length must be higher than 0")
-        return expression.develop()
+    __slots__ = ()
 
 
 class TermTermMultiplicationTerm(TermExpressionMultiplicationTerm):
-    def develop(self) -> Union[None, TermOrExpression]:
+    __slots__ = ()
+    
+    def develop(self, max_degree: Optional[int] = None) -> TermOrExpression:
+        if max_degree is not None:
+            return _develop_truncated(self, max_degree)
         factor = self.expr_1.term
         term = self.expr_2.term
         
-        multiplier = term.multiplier * factor.multiplier
-        
-        if isinstance(factor.variables, Variables):
-            variables = factor.variables.copy()
+        multiplier = self.multiplier * term.multiplier * factor.multiplier
+        return Term.from_variables(multiplier, factor.variables + term.variables)
+
+
+class ExpressionPowerTerm(AbstractTerm):
+    __slots__ = ('expr', 'exponent')
+    
+    def __init__(self, expr: AbstractExpression, exponent: int, multiplier: int = 1):
+        super().__init__()
+        self.expr = expr
+        self.exponent = exponent
+        self.multiplier = multiplier
+        self.variables: Map = {'expr': self.expr, 'exponent': self.exponent}
+        _link(expr)
+    
+    @property
+    def degree(self) -> int:
+        return self.expr.degree * self.exponent
+    
+    def __add__(self, value: TermOrExpression) -> TermOrExpression:
+        if isinstance(value, AbstractExpression):
+            return value + self
+        elif isinstance(value, ExpressionPowerTerm):
+            if value.exponent == self.exponent and value.expr == self.expr:
+                return ExpressionPowerTerm(self.expr.copy(), self.exponent, self.multiplier + value.multiplier)
+            else:
+                return Expression(self) + value
+        elif isinstance(value, AbstractTerm):
+            return Expression(self) + value
         else:
-            variables = Variables(factor.variables)
-            
-        for var_name, value in term.variables.items():
-            variables[var_name] += value
-        
-        new_term = Term(multiplier, **variables)
-        return new_term
+            return NotImplemented
+    
+    def __neg__(self) -> AbstractTerm:
+        return self * -1
+    
+    def __sub__(self, value: TermOrExpression) -> TermOrExpression:
+        return self + (-value)
+    
+    def __mul__(self, value: Union[TermOrExpression, int]) -> AbstractTerm:
+        if isinstance(value, int):
+            return ExpressionPowerTerm(self.expr.copy(), self.exponent, self.multiplier * value)
+        else:
+            return NotImplemented
+    
+    def __rmul__(self, value: Union[TermOrExpression, int]) -> AbstractTerm:
+        return self * value
+    
+    def __pow__(self, exponent: int) -> AbstractTerm:
+        if not _check_exponent(exponent):
+            return NotImplemented
+        return ExpressionPowerTerm(self.expr.copy(), self.exponent * exponent, self.multiplier ** exponent)
+    
+    def is_null(self) -> bool:
+        return self.multiplier == 0 or (self.exponent > 0 and self.expr.is_null())
+    
+    def __repr__(self) -> str:
+        txt = f'({self.expr}){str(self.exponent).translate(SUPERSCRIPTS)}'
+        if self.multiplier != 1:
+            return f'{self.multiplier}{txt}'
+        return txt
+    
+    def develop(self, max_degree: Optional[int] = None) -> TermOrExpression:
+        if max_degree is not None:
+            return _develop_truncated(self, max_degree)
+        return _single_term_or_expression(sparse.power_terms(self.expr.develop(), self.exponent, self.multiplier))
+    
+    def derive(self, variable: str, develop: bool = False) -> TermOrExpression:
+        if self.exponent == 0:
+            return Term(0)
+        if self.exponent == 1:
+            derivative = self.expr.derive(variable, develop) * self.multiplier
+            return derivative.develop() if develop else derivative
+        power = ExpressionPowerTerm(self.expr, self.exponent - 1, self.multiplier * self.exponent)
+        derivative = Expression(ExpressionMultiplicationTerm(Expression(power), self.expr.derive(variable, develop)))
+        if develop:
+            return derivative.develop()
+        return derivative
+    
+    def integrate(self, variable: str) -> TermOrExpression:
+        return self.develop().integrate(variable)
+    
+    @property
+    def variable_names(self) -> Sequence[str]:
+        return self.expr.variable_names
+    
+    def is_polynom_term(self) -> bool:
+        return self.expr.is_polynom()
+    
+    def _structural_key(self) -> Any:
+        return 'power', self.multiplier, self.expr._structural_key(), self.exponent
+    
+    def _structural_hash(self) -> int:
+        return hash(('power', self.multiplier, self.expr._structural_hash(), self.exponent))
     
 
 a = Term(1, x=1)
@@ -416,3 +881,10 @@ f = Term(2, x=7)
 g = Term(2, x=8)
 h = Term(2, x=9)
 
+
+
+from . import polynoms
+from . import sparse
+from . import substitution
+from . import streaming
+from . import factorization
@@ -0,0 +1,562 @@
+# -*- coding:Utf-8 -*-
+
+
+from . import expressions as mexpr
+from . import polynoms
+from itertools import combinations
+from math import gcd, isqrt
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import random
+
+# Dense polynomials are lists of coefficients from the constant term up, without trailing zeros: [] is 0.
+Polynom = List[int]
+Factors = List[Tuple[Polynom, int]]
+
+_PRIMES = [p for p in range(3, 2000) if all(p % q for q in range(2, isqrt(p) + 1))]
+
+
+def _trim(a: Polynom) -> Polynom:
+    while a and a[-1] == 0:
+        a.pop()
+    return a
+
+
+def _degree(a: Polynom) -> int:
+    return len(a) - 1
+
+
+def _content(a: Polynom) -> int:
+    result = 0
+    for coefficient in a:
+        result = gcd(result, coefficient)
+        if result == 1:
+            break
+    return -result if a and a[-1] < 0 else result
+
+
+def _primitive(a: Polynom) -> Polynom:
+    content = _content(a)
+    return [coefficient // content for coefficient in a] if content not in (0, 1) else list(a)
+
+
+def _derivative(a: Polynom) -> Polynom:
+    return _trim([i * a[i] for i in range(1, len(a))])
+
+
+def _pack(a: Polynom, width: int) -> int:
+    return int.from_bytes(b''.join(coefficient.to_bytes(width, 'little') for coefficient in a), 'little')
+
+
+def _multiply_natural(a: Polynom, b: Polynom) -> Polynom:
+    # Kronecker substitution: both operands are packed into big ints, so the product runs at C speed.
+    if not a or not b:
+        return []
+    bound = max(max(a), 1) * max(max(b), 1) * min(len(a), len(b))
+    width = (bound.bit_length() + 8) // 8
+    product = (_pack(a, width) * _pack(b, width)).to_bytes(width * (len(a) + len(b) - 1), 'little')
+    return [int.from_bytes(product[i:i + width], 'little') for i in range(0, len(product), width)]
+
+
+def _add(a: Polynom, b: Polynom) -> Polynom:
+    if len(a) < len(b):
+        a, b = b, a
+    result = list(a)
+    for i, coefficient in enumerate(b):
+        result[i] += coefficient
+    return _trim(result)
+
+
+def _sub(a: Polynom, b: Polynom) -> Polynom:
+    return _add(a, [-coefficient for coefficient in b])
+
+
+def _multiply(a: Polynom, b: Polynom) -> Polynom:
+    positive_a = [max(coefficient, 0) for coefficient in a]
+    negative_a = [max(-coefficient, 0) for coefficient in a]
+    positive_b = [max(coefficient, 0) for coefficient in b]
+    negative_b = [max(-coefficient, 0) for coefficient in b]
+    result = _add(_multiply_natural(positive_a, positive_b), _multiply_natural(negative_a, negative_b))
+    return _sub(result, _add(_multiply_natural(positive_a, negative_b), _multiply_natural(negative_a, positive_b)))
+
+
+def _divide_exact(a: Polynom, b: Polynom) -> Optional[Polynom]:
+    remainder = list(a)
+    if len(remainder) < len(b):
+        return [] if not remainder else None
+    quotient = [0] * (len(remainder) - len(b) + 1)
+    leading = b[-1]
+    for i in range(len(quotient) - 1, -1, -1):
+        coefficient = remainder[i + len(b) - 1]
+        if coefficient % leading:
+            return None
+        coefficient //= leading
+        quotient[i] = coefficient
+        if coefficient:
+            for j, value in enumerate(b):
+                remainder[i + j] -= coefficient * value
+    if any(remainder[:len(b) - 1]):
+        return None
+    return _trim(quotient)
+
+
+def _pseudo_remainder(a: Polynom, b: Polynom) -> Polynom:
+    remainder = list(a)
+    leading = b[-1]
+    while len(remainder) >= len(b) and remainder:
+        shift = len(remainder) - len(b)
+        coefficient = remainder[-1]
+        remainder = [value * leading for value in remainder]
+        for j, value in enumerate(b):
+            remainder[shift + j] -= coefficient * value
+        _trim(remainder)
+    return remainder
+
+
+def _gcd(a: Polynom, b: Polynom) -> Polynom:
+    # Primitive polynomial remainder sequence: contents are removed at each step to keep coefficients small.
+    if not a:
+        return _primitive(b)
+    if not b:
+        return _primitive(a)
+    content = gcd(_content(a), _content(b))
+    a, b = _primitive(a), _primitive(b)
+    if len(a) < len(b):
+        a, b = b, a
+    while b:
+        a, b = b, _pseudo_remainder(a, b)
+        if b:
+            b = _primitive(b)
+    result = _primitive(a)
+    return [coefficient * content for coefficient in result]
+
+
+def square_free_decomposition(f: Polynom) -> Factors:
+    # Yun's algorithm on a primitive polynomial with a positive leading coefficient.
+    result = []
+    derivative = _derivative(f)
+    g = _gcd(f, derivative)
+    c = _divide_exact(f, g)
+    d = _sub(_divide_exact(derivative, g), _derivative(c))
+    multiplicity = 1
+    while _degree(c) > 0:
+        a = _gcd(c, d)
+        if a[-1] < 0:
+            a = [-coefficient for coefficient in a]
+        if _degree(a) > 0:
+            result.append((a, multiplicity))
+        c = _divide_exact(c, a)
+        d = _sub(_divide_exact(d, a), _derivative(c))
+        multiplicity += 1
+    return result
+
+
+# Polynomials modulo p, coefficients in [0, p).
+
+def _mod(a: Polynom, p: int) -> Polynom:
+    return _trim([coefficient % p for coefficient in a])
+
+
+def _multiply_mod(a: Polynom, b: Polynom, p: int) -> Polynom:
+    return _mod(_multiply_natural(a, b), p)
+
+
+def _divmod_mod(a: Polynom, b: Polynom, p: int) -> Tuple[Polynom, Polynom]:
+    remainder = list(a)
+    if len(remainder) < len(b):
+        return [], remainder
+    inverse = pow(b[-1], -1, p)
+    quotient = [0] * (len(remainder) - len(b) + 1)
+    for i in range(len(quotient) - 1, -1, -1):
+        coefficient = remainder[i + len(b) - 1] * inverse % p
+        quotient[i] = coefficient
+        if coefficient:
+            for j, value in enumerate(b):
+                remainder[i + j] = (remainder[i + j] - coefficient * value) % p
+    return _trim(quotient), _trim(remainder[:len(b) - 1])
+
+
+def _monic_mod(a: Polynom, p: int) -> Polynom:
+    if not a:
+        return a
+    inverse = pow(a[-1], -1, p)
+    return [coefficient * inverse % p for coefficient in a]
+
+
+def _gcd_mod(a: Polynom, b: Polynom, p: int) -> Polynom:
+    while b:
+        a, b = b, _divmod_mod(a, b, p)[1]
+    return _monic_mod(a, p)
+
+
+def _gcdex_mod(a: Polynom, b: Polynom, p: int) -> Tuple[Polynom, Polynom, Polynom]:
+    r0, r1 = a, b
+    s0, s1 = [1], []
+    t0, t1 = [], [1]
+    while r1:
+        quotient, remainder = _divmod_mod(r0, r1, p)
+        r0, r1 = r1, remainder
+        s0, s1 = s1, _mod(_sub(s0, _multiply_mod(quotient, s1, p)), p)
+        t0, t1 = t1, _mod(_sub(t0, _multiply_mod(quotient, t1, p)), p)
+    inverse = pow(r0[-1], -1, p)
+    return ([value * inverse % p for value in r0], [value * inverse % p for value in s0],
+            [value * inverse % p for value in t0])
+
+
+def _powmod_mod(base: Polynom, exponent: int, modulus: Polynom, p: int) -> Polynom:
+    result = [1]
+    base = _divmod_mod(base, modulus, p)[1]
+    while exponent:
+        if exponent & 1:
+            result = _divmod_mod(_multiply_mod(result, base, p), modulus, p)[1]
+        exponent >>= 1
+        if exponent:
+            base = _divmod_mod(_multiply_mod(base, base, p), modulus, p)[1]
+    return result
+
+
+def _frobenius_matrix(f: Polynom, p: int) -> List[Polynom]:
+    # Row i is x^(p·i) mod f: applying the rows to the coefficients of h gives h^p mod f with n² products
+    # instead of a modular exponentiation.
+    n = _degree(f)
+    rows = [[1]]
+    current = [1] + [0] * (n - 1)
+    x_power = _powmod_mod([0, 1], p, f, p) if n > 1 else _divmod_mod([0, 1], f, p)[1]
+    for _ in range(1, n):
+        current = _divmod_mod(_multiply_mod(current, x_power, p), f, p)[1]
+        rows.append(list(current))
+    return rows
+
+
+def _apply_frobenius(h: Polynom, rows: List[Polynom], p: int) -> Polynom:
+    result = [0] * max((len(row) for row in rows), default=0)
+    for coefficient, row in zip(h, rows):
+        if coefficient:
+            for j, value in enumerate(row):
+                result[j] += coefficient * value
+    return _mod(result, p)
+
+
+def _distinct_degree(f: Polynom, p: int) -> List[Tuple[Polynom, int]]:
+    result = []
+    rows = _frobenius_matrix(f, p)
+    h = [0, 1]
+    degree = 1
+    while _degree(f) >= 2 * degree:
+        h = _apply_frobenius(h, rows, p)
+        g = _gcd_mod(f, _mod(_sub(h, [0, 1]), p), p)
+        if _degree(g) > 0:
+            result.append((g, degree))
+            f = _divmod_mod(f, g, p)[0]
+            if _degree(f) > 0:
+                rows = _frobenius_matrix(f, p)
+                h = _divmod_mod(h, f, p)[1]
+        degree += 1
+    if _degree(f) > 0:
+        result.append((f, _degree(f)))
+    return result
+
+
+def _equal_degree(f: Polynom, degree: int, p: int, generator: random.Random) -> List[Polynom]:
+    # Cantor–Zassenhaus with the trace map a + a^p + ... + a^(p^(d-1)), computed with the Frobenius matrix.
+    if _degree(f) == degree:
+        return [f]
+    rows = _frobenius_matrix(f, p)
+    while True:
+        a = _trim([generator.randrange(p) for _ in range(_degree(f))])
+        if _degree(a) < 1:
+            continue
+        trace = a
+        power = a
+        for _ in range(degree - 1):
+            power = _apply_frobenius(power, rows, p)
+            trace = _mod(_add(trace, power), p)
+        b = _mod(_sub(_powmod_mod(trace, (p - 1) // 2, f, p), [1]), p)
+        g = _gcd_mod(f, b, p)
+        if 0 < _degree(g) < _degree(f):
+            return (_equal_degree(g, degree, p, generator) +
+                    _equal_degree(_divmod_mod(f, g, p)[0], degree, p, generator))
+
+
+def factor_mod(f: Polynom, p: int, seed: int = 0) -> List[Polynom]:
+    generator = random.Random(seed)
+    f = _monic_mod(_mod(f, p), p)
+    factors = []
+    for part, degree in _distinct_degree(f, p):
+        factors.extend(_equal_degree(part, degree, p, generator))
+    return factors
+
+
+def _choose_prime(f: Polynom, attempts: int = 3) -> Tuple[int, List[Polynom]]:
+    # Several suitable primes are tried and the one giving the fewest modular factors is kept: recombination is
+    # exponential in that number.
+    best = None
+    derivative = _derivative(f)
+    for p in _PRIMES:
+        if f[-1] % p == 0:
+            continue
+        reduced = _mod(f, p)
+        if _degree(_gcd_mod(reduced, _mod(derivative, p), p)) > 0:
+            continue
+        factors = factor_mod(f, p)
+        if best is None or len(factors) < len(best[1]):
+            best = (p, factors)
+        attempts -= 1
+        if attempts == 0 or len(factors) == 1:
+            break
+    if best is None:
+        raise ValueError('no suitable prime found')
+    return best
+
+
+def _hensel_step(f: Polynom, g: Polynom, h: Polynom, s: Polynom, t: Polynom, m: int) -> Tuple[Polynom, ...]:
+    # Quadratic Hensel step: from f ≡ gh and sg + th ≡ 1 mod m to the same identities mod m².
+    modulus = m * m
+    e = _mod(_sub(f, _multiply(g, h)), modulus)
+    q, r = _divmod_mod(_multiply_mod(s, e, modulus), h, modulus)
+    g = _mod(_add(_add(g, _multiply(t, e)), _multiply(q, g)), modulus)
+    h = _mod(_add(h, r), modulus)
+    b = _mod(_sub(_add(_multiply(s, g), _multiply(t, h)), [1]), modulus)
+    c, d = _divmod_mod(_multiply_mod(s, b, modulus), h, modulus)
+    s = _mod(_sub(s, d), modulus)
+    t = _mod(_sub(_sub(t, _multiply(t, b)), _multiply(c, g)), modulus)
+    return g, h, s, t
+
+
+def hensel_lift(f: Polynom, factors: List[Polynom], p: int, modulus: int) -> List[Polynom]:
+    if len(factors) == 1:
+        return [_monic_mod(_mod(f, modulus), modulus)]
+    middle = len(factors) // 2
+    left, right = factors[:middle], factors[middle:]
+
+    g = [f[-1] % p]
+    for factor in left:
+        g = _multiply_mod(g, factor, p)
+    h = [1]
+    for factor in right:
+        h = _multiply_mod(h, factor, p)
+    _, s, t = _gcdex_mod(g, h, p)
+
+    m = p
+    while m < modulus:
+        g, h, s, t = _hensel_step(f, g, h, s, t, m)
+        m *= m
+    g, h = _mod(g, modulus), _mod(h, modulus)
+    return hensel_lift(g, left, p, modulus) + hensel_lift(h, right, p, modulus)
+
+
+def _symmetric(a: Polynom, modulus: int) -> Polynom:
+    half = modulus // 2
+    return _trim([coefficient % modulus - modulus if coefficient % modulus > half else coefficient % modulus
+                  for coefficient in a])
+
+
+def _factor_square_free(f: Polynom) -> List[Polynom]:
+    if _degree(f) <= 1:
+        return [f]
+    p, modular_factors = _choose_prime(f)
+    if len(modular_factors) == 1:
+        return [f]
+
+    norm = isqrt(sum(coefficient * coefficient for coefficient in f)) + 1
+    bound = 2 * abs(f[-1]) * 2 ** _degree(f) * norm + 1
+    modulus = p
+    while modulus < bound:
+        modulus *= modulus
+    lifted = hensel_lift(f, modular_factors, p, modulus)
+
+    # Zassenhaus recombination: subsets of lifted factors are tried by increasing size. The constant term of a
+    # candidate is checked before the candidate is built.
+    result = []
+    size = 1
+    while 2 * size <= len(lifted):
+        found = False
+        leading = f[-1]
+        constant = leading * f[0]
+        for subset in combinations(range(len(lifted)), size):
+            tail = leading
+            for index in subset:
+                tail = tail * (lifted[index][0] if lifted[index] else 0) % modulus
+            if tail > modulus // 2:
+                tail -= modulus
+            if constant and (tail == 0 or constant % tail):
+                continue
+            candidate = [leading]
+            for index in subset:
+                candidate = _multiply_mod(candidate, lifted[index], modulus)
+            candidate = _primitive(_symmetric(candidate, modulus))
+            quotient = _divide_exact(f, candidate)
+            if quotient is None:
+                continue
+            result.append(candidate if candidate[-1] > 0 else [-coefficient for coefficient in candidate])
+            lifted = [factor for index, factor in enumerate(lifted) if index not in subset]
+            f = quotient
+            found = True
+            break
+        if not found:
+            size += 1
+    result.append(f if f[-1] > 0 else [-coefficient for coefficient in f])
+    return result
+
+
+def factor_polynom(f: Polynom) -> Tuple[int, Factors]:
+    f = _trim(list(f))
+    if not f:
+        return 0, []
+    content = _content(f)
+    f = _primitive(f)
+    factors = []
+    zeros = next(i for i, coefficient in enumerate(f) if coefficient != 0)
+    if zeros:
+        factors.append(([0, 1], zeros))
+        f = f[zeros:]
+    if _degree(f) > 0:
+        for part, multiplicity in square_free_decomposition(f):
+            factors.extend((factor, multiplicity) for factor in _factor_square_free(part))
+    factors.sort(key=lambda item: (len(item[0]), item[0]))
+    return content, factors
+
+
+# Bivariate polynomials are dicts {(i, j): coefficient} for the monomials xⁱyʲ.
+
+def _divide_bivariate(a: Dict[Tuple[int, int], int], b: Dict[Tuple[int, int], int]) -> Optional[Dict[Tuple[int, int], int]]:
+    remainder = dict(a)
+    quotient = {}
+    leading = max(b)
+    leading_coefficient = b[leading]
+    while remainder:
+        monomial = max(remainder)
+        coefficient = remainder[monomial]
+        shift = (monomial[0] - leading[0], monomial[1] - leading[1])
+        if shift[0] < 0 or shift[1] < 0 or coefficient % leading_coefficient:
+            return None
+        factor = coefficient // leading_coefficient
+        quotient[shift] = factor
+        for (i, j), value in b.items():
+            key = (i + shift[0], j + shift[1])
+            remainder[key] = remainder.get(key, 0) - factor * value
+            if remainder[key] == 0:
+                del remainder[key]
+    return quotient
+
+
+def factor_bivariate(f: Dict[Tuple[int, int], int]) -> Tuple[int, List[Tuple[Dict[Tuple[int, int], int], int]]]:
+    f = {monomial: coefficient for monomial, coefficient in f.items() if coefficient != 0}
+    if not f:
+        return 0, []
+    content = _content(list(f.values()))
+    if f[max(f)] < 0:
+        content = -abs(content)
+    else:
+        content = abs(content)
+    f = {monomial: coefficient // content for monomial, coefficient in f.items()}
+
+    factors = []
+    shift_x = min(i for i, _ in f)
+    shift_y = min(j for _, j in f)
+    if shift_x:
+        factors.append(({(1, 0): 1}, shift_x))
+    if shift_y:
+        factors.append(({(0, 1): 1}, shift_y))
+    f = {(i - shift_x, j - shift_y): coefficient for (i, j), coefficient in f.items()}
+
+    # Kronecker substitution y = x^D with D above the x-degree of f: every factor of f maps to a product of
+    # factors of the univariate image, found back by trial division.
+    width = max(i for i, _ in f) + 1
+    image = [0] * (max(i + width * j for i, j in f) + 1)
+    for (i, j), coefficient in f.items():
+        image[i + width * j] = coefficient
+    _, univariate = factor_polynom(image)
+    pool = [factor for factor, multiplicity in univariate for _ in range(multiplicity)]
+
+    found = []
+    size = 1
+    while pool and size <= len(pool):
+        for subset in combinations(range(len(pool)), size):
+            candidate = [1]
+            for index in subset:
+                candidate = _multiply(candidate, pool[index])
+            preimage = {(exponent % width, exponent // width): coefficient
+                        for exponent, coefficient in enumerate(candidate) if coefficient}
+            quotient = _divide_bivariate(f, preimage)
+            if quotient is None:
+                continue
+            if preimage[max(preimage)] < 0:
+                preimage = {monomial: -coefficient for monomial, coefficient in preimage.items()}
+                quotient = {monomial: -coefficient for monomial, coefficient in quotient.items()}
+            found.append(preimage)
+            f = quotient
+            pool = [factor for index, factor in enumerate(pool) if index not in subset]
+            break
+        else:
+            size += 1
+    if f != {(0, 0): 1}:
+        if f.get((0, 0)) == -1 and len(f) == 1:
+            content = -content
+        else:
+            found.append(f)
+
+    for factor in found:
+        for i, (existing, multiplicity) in enumerate(factors):
+            if existing == factor:
+                factors[i] = (existing, multiplicity + 1)
+                break
+        else:
+            factors.append((factor, 1))
+    return content, factors
+
+
+def factor_list(expression: mexpr.TermOrExpression) -> Tuple[Any, List[Tuple[mexpr.TermOrExpression, int]]]:
+    developed = expression.develop()
+    if isinstance(developed, mexpr.AbstractTerm):
+        developed = mexpr.Expression(developed)
+    names = sorted(developed.variable_names)
+    if not names:
+        return sum(term.multiplier for term in developed.get_all_terms()), []
+
+    terms = list(developed.get_all_terms())
+    for term in terms:
+        if not isinstance(term.multiplier, int) or any(exponent < 0 for exponent in term.variables.values()):
+            raise ValueError('only polynomials with integer coefficients and natural exponents can be factored')
+
+    if len(names) == 1:
+        if not developed.is_polynom():
+            raise ValueError('this expression is not a polynom')
+        variable, = names
+        content, factors = factor_polynom(polynoms.to_coefficients(developed, variable))
+        return content, [(_univariate_expression(factor, variable), multiplicity) for factor, multiplicity in factors]
+    if len(names) == 2:
+        coefficients = {}
+        for term in terms:
+            key = (term.variables[names[0]], term.variables[names[1]])
+            coefficients[key] = coefficients.get(key, 0) + term.multiplier
+        content, factors = factor_bivariate(coefficients)
+        return content, [(_bivariate_expression(factor, names), multiplicity) for factor, multiplicity in factors]
+    raise ValueError('only univariate and bivariate polynomials can be factored')
+
+
+def _univariate_expression(factor: Polynom, variable: str) -> mexpr.AbstractExpression:
+    return polynoms.from_coefficients(factor, variable)
+
+
+def _bivariate_expression(factor: Dict[Tuple[int, int], int], names: Sequence[str]) -> mexpr.AbstractExpression:
+    return mexpr.Expression.from_terms([mexpr.Term(coefficient, **{names[0]: i, names[1]: j})
+                                        for (i, j), coefficient in sorted(factor.items(), reverse=True)])
+
+
+def factor(expression: mexpr.TermOrExpression) -> mexpr.TermOrExpression:
+    content, factors = factor_list(expression)
+    if not factors:
+        return mexpr.Term(content)
+    if len(factors) == 1:
+        (factor_expression, multiplicity), = factors
+        if multiplicity > 1:
+            return mexpr.Expression(mexpr.ExpressionPowerTerm(factor_expression, multiplicity, content))
+        if content == 1:
+            return factor_expression
+        return mexpr.Expression(mexpr.ExpressionMultiplicationTerm(mexpr.Expression(mexpr.Term(content)), factor_expression))
+    parts = [factor_expression if multiplicity == 1 else mexpr.Expression(mexpr.ExpressionPowerTerm(factor_expression, multiplicity))
+             for factor_expression, multiplicity in factors]
+    product = parts[0]
+    for part in parts[1:-1]:
+        product = mexpr.Expression(mexpr.ExpressionMultiplicationTerm(product, part))
+    return mexpr.Expression(mexpr.ExpressionMultiplicationTerm(product, parts[-1], content))
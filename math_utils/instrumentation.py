@@ -0,0 +1,163 @@
+# -*- coding:Utf-8 -*-
+
+
+from . import expressions as mexpr
+from . import sparse
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import functools
+import time
+
+Hook = Callable[[str, tuple, Any, float], None]
+
+
+def _targets() -> List[Tuple[Any, str, str]]:
+    return [
+        (mexpr.Term, '__init__', 'term_allocations'),
+        (mexpr.Term, 'from_variables', 'term_allocations'),
+        (mexpr.ExpressionMultiplicationTerm, '__init__', 'product_allocations'),
+        (mexpr.ExpressionPowerTerm, '__init__', 'power_allocations'),
+        (mexpr.Expression, '__init__', 'expression_nodes'),
+        (mexpr.Variables, '__eq__', 'variables_comparisons'),
+        (mexpr.Variables, '__add__', 'variables_products'),
+        (mexpr.Expression, '__iadd__', 'merges'),
+        (mexpr.Expression, '__eq__', 'expression_comparisons'),
+        (mexpr.Expression, 'develop', 'develop_calls'),
+        (mexpr.Term, 'develop', 'develop_calls'),
+        (mexpr.ExpressionMultiplicationTerm, 'develop', 'develop_calls'),
+        (mexpr.TermTermMultiplicationTerm, 'develop', 'develop_calls'),
+        (mexpr.ExpressionPowerTerm, 'develop', 'develop_calls'),
+        (sparse, 'multiply', 'sparse_multiplications'),
+        (sparse, 'power', 'sparse_powers'),
+    ]
+
+
+class Report:
+    def __init__(self) -> None:
+        self.counters: Counter = Counter()
+        self.times: Dict[str, float] = {}
+        self.max_depths: Dict[str, int] = {}
+        self.elapsed = 0.0
+
+    def __getitem__(self, name: str) -> int:
+        return self.counters[name]
+
+    def to_dict(self) -> dict:
+        return {'counters': dict(self.counters), 'times': dict(self.times), 'max_depths': dict(self.max_depths),
+                'elapsed': self.elapsed}
+
+    def __repr__(self) -> str:
+        txt = f'{self.elapsed * 1000:.3f} ms'
+        for name, count in sorted(self.counters.items(), key=lambda item: -item[1]):
+            txt += f'\n  {name}: {count:,} calls, {self.times.get(name, 0) * 1000:.3f} ms, depth {self.max_depths.get(name, 0)}'
+        return txt
+
+
+class Instrumentation:
+    # Nothing is wrapped while disabled: enable() swaps the counted methods for counting wrappers and disable()
+    # puts the originals back, so the hot paths are untouched unless a report is being collected.
+    def __init__(self) -> None:
+        self.report = Report()
+        self.hooks: List[Hook] = []
+        self._originals: List[Tuple[Any, str, Any]] = []
+        self._depths: Counter = Counter()
+        self._users = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._originals)
+
+    def enable(self) -> None:
+        self._users += 1
+        if self._originals:
+            return
+        for owner, attribute, name in _targets():
+            original = vars(owner)[attribute]
+            self._originals.append((owner, attribute, original))
+            if isinstance(original, classmethod):
+                wrapped = classmethod(self._wrap(original.__func__, name))
+            else:
+                wrapped = self._wrap(original, name)
+            setattr(owner, attribute, wrapped)
+
+    def disable(self, force: bool = False) -> None:
+        self._users = 0 if force else max(self._users - 1, 0)
+        if self._users:
+            return
+        for owner, attribute, original in reversed(self._originals):
+            setattr(owner, attribute, original)
+        self._originals = []
+
+    def reset(self) -> None:
+        self.report = Report()
+
+    def add_hook(self, hook: Hook) -> None:
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook: Hook) -> None:
+        self.hooks.remove(hook)
+
+    def _wrap(self, function: Callable, name: str) -> Callable:
+        depths = self._depths
+        perf_counter = time.perf_counter
+
+        @functools.wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            report = self.report
+            report.counters[name] += 1
+            depths[name] += 1
+            if depths[name] > report.max_depths.get(name, 0):
+                report.max_depths[name] = depths[name]
+            start = perf_counter()
+            try:
+                result = function(*args, **kwargs)
+            finally:
+                depths[name] -= 1
+            elapsed = perf_counter() - start
+            # Nested calls are timed inclusively but only counted once in the time of the outermost call.
+            if depths[name] == 0:
+                report.times[name] = report.times.get(name, 0.0) + elapsed
+            for hook in self.hooks:
+                hook(name, args, result, elapsed)
+            return result
+        return wrapper
+
+
+instrumentation = Instrumentation()
+
+
+def enable() -> None:
+    instrumentation.enable()
+
+
+def disable() -> None:
+    instrumentation.disable()
+
+
+def add_hook(hook: Hook) -> None:
+    instrumentation.add_hook(hook)
+
+
+def remove_hook(hook: Hook) -> None:
+    instrumentation.remove_hook(hook)
+
+
+@contextmanager
+def collect(hook: Optional[Hook] = None) -> Iterator[Report]:
+    previous = instrumentation.report
+    instrumentation.report = report = Report()
+    if hook is not None:
+        instrumentation.add_hook(hook)
+    instrumentation.enable()
+    start = time.perf_counter()
+    try:
+        yield report
+    finally:
+        report.elapsed = time.perf_counter() - start
+        instrumentation.disable()
+        if hook is not None:
+            instrumentation.remove_hook(hook)
+        instrumentation.report = previous
+        for name, count in report.counters.items():
+            previous.counters[name] += count
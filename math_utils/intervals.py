@@ -0,0 +1,270 @@
+# -*- coding:Utf-8 -*-
+
+
+from . import expressions as mexpr
+from .math_sets import Interval
+from typing import Any, Callable, Iterable, Mapping, Tuple, Union
+import math
+
+Endpoint = Tuple[Any, bool]
+
+
+class IndeterminateComparison(TypeError):
+    pass
+
+
+def _product(value_1: Any, value_2: Any) -> Any:
+    if value_1 == 0 or value_2 == 0:
+        return 0
+    return value_1 * value_2
+
+
+def _lowest(endpoints: Iterable[Endpoint]) -> Endpoint:
+    endpoints = list(endpoints)
+    value = min(value for value, _ in endpoints)
+    return value, any(included for candidate, included in endpoints if candidate == value)
+
+
+def _highest(endpoints: Iterable[Endpoint]) -> Endpoint:
+    endpoints = list(endpoints)
+    value = max(value for value, _ in endpoints)
+    return value, any(included for candidate, included in endpoints if candidate == value)
+
+
+class Bounds:
+    __slots__ = ('lower', 'upper', 'include_lower', 'include_upper')
+
+    def __init__(self, lower: Any, upper: Any, include_lower: bool = True, include_upper: bool = True) -> None:
+        if lower > upper:
+            raise ValueError('lower bound cannot be greater than upper bound')
+        self.lower = lower
+        self.upper = upper
+        self.include_lower = include_lower and not math.isinf(lower)
+        self.include_upper = include_upper and not math.isinf(upper)
+
+    @classmethod
+    def from_interval(cls, interval: Interval) -> 'Bounds':
+        return cls(interval.start, interval.stop, not interval.start_exclusiv, not interval.stop_exclusiv)
+
+    @classmethod
+    def point(cls, value: Any) -> 'Bounds':
+        return cls(value, value)
+
+    def to_interval(self) -> Interval:
+        return Interval(self.lower, self.upper, self.include_lower, self.include_upper)
+
+    def __repr__(self) -> str:
+        return f"{'[' if self.include_lower else ']'}{self.lower};{self.upper}{']' if self.include_upper else '['}"
+
+    def __contains__(self, value: Any) -> bool:
+        above = self.lower <= value if self.include_lower else self.lower < value
+        below = value <= self.upper if self.include_upper else value < self.upper
+        return above and below
+
+    def is_above(self, value: Any) -> bool:
+        return self.lower > value or (self.lower == value and not self.include_lower)
+
+    def is_below(self, value: Any) -> bool:
+        return self.upper < value or (self.upper == value and not self.include_upper)
+
+    def is_within(self, interval: Interval) -> bool:
+        other = Bounds.from_interval(interval)
+        above = other.lower < self.lower or (other.lower == self.lower and (other.include_lower or not self.include_lower))
+        below = self.upper < other.upper or (self.upper == other.upper and (other.include_upper or not self.include_upper))
+        return above and below
+
+    def is_disjoint(self, interval: Interval) -> bool:
+        other = Bounds.from_interval(interval)
+        return (self.is_below(other.lower) or other.is_below(self.lower) or
+                (self.upper == other.lower and not (self.include_upper and other.include_lower)) or
+                (other.upper == self.lower and not (other.include_upper and self.include_lower)))
+
+    @property
+    def endpoints(self) -> Tuple[Endpoint, Endpoint]:
+        return (self.lower, self.include_lower), (self.upper, self.include_upper)
+
+    @staticmethod
+    def _coerce(value: Any) -> 'Bounds':
+        if isinstance(value, Bounds):
+            return value
+        if isinstance(value, Interval):
+            return Bounds.from_interval(value)
+        if isinstance(value, (int, float)):
+            return Bounds.point(value)
+        return NotImplemented
+
+    def __add__(self, value: Any) -> 'Bounds':
+        other = self._coerce(value)
+        if other is NotImplemented:
+            return NotImplemented
+        return Bounds(self.lower + other.lower, self.upper + other.upper,
+                      self.include_lower and other.include_lower, self.include_upper and other.include_upper)
+
+    __radd__ = __add__
+
+    def __neg__(self) -> 'Bounds':
+        return Bounds(-self.upper, -self.lower, self.include_upper, self.include_lower)
+
+    def __pos__(self) -> 'Bounds':
+        return self
+
+    def __sub__(self, value: Any) -> 'Bounds':
+        other = self._coerce(value)
+        if other is NotImplemented:
+            return NotImplemented
+        return self + (-other)
+
+    def __rsub__(self, value: Any) -> 'Bounds':
+        return (-self) + value
+
+    def __mul__(self, value: Any) -> 'Bounds':
+        other = self._coerce(value)
+        if other is NotImplemented:
+            return NotImplemented
+        # An included zero endpoint is reached whatever the other factor is, so the product endpoint is included.
+        candidates = [(_product(value_1, value_2), (included_1 and included_2) or (value_1 == 0 and included_1) or
+                       (value_2 == 0 and included_2))
+                      for value_1, included_1 in self.endpoints for value_2, included_2 in other.endpoints]
+        lower, include_lower = _lowest(candidates)
+        upper, include_upper = _highest(candidates)
+        return Bounds(lower, upper, include_lower, include_upper)
+
+    __rmul__ = __mul__
+
+    def reciprocal(self) -> 'Bounds':
+        if 0 in self or (self.lower < 0 < self.upper):
+            return Bounds(-math.inf, math.inf, False, False)
+        if self.lower == 0:
+            return Bounds(1 / self.upper if not math.isinf(self.upper) else 0, math.inf, self.include_upper, False)
+        if self.upper == 0:
+            return Bounds(-math.inf, 1 / self.lower if not math.isinf(self.lower) else 0, False, self.include_lower)
+        return Bounds(1 / self.upper if not math.isinf(self.upper) else 0, 1 / self.lower if not math.isinf(self.lower) else 0,
+                      self.include_upper, self.include_lower)
+
+    def __truediv__(self, value: Any) -> 'Bounds':
+        other = self._coerce(value)
+        if other is NotImplemented:
+            return NotImplemented
+        if other.lower == other.upper == 0:
+            raise ZeroDivisionError('division by the zero interval')
+        return self * other.reciprocal()
+
+    def __rtruediv__(self, value: Any) -> 'Bounds':
+        other = self._coerce(value)
+        if other is NotImplemented:
+            return NotImplemented
+        return other / self
+
+    def __pow__(self, exponent: Any) -> 'Bounds':
+        if not isinstance(exponent, int):
+            return NotImplemented
+        if exponent == 0:
+            return Bounds.point(1)
+        if exponent < 0:
+            return (self ** -exponent).reciprocal()
+        (lower, include_lower), (upper, include_upper) = self.endpoints
+        if exponent % 2 == 1 or lower >= 0:
+            return Bounds(lower ** exponent, upper ** exponent, include_lower, include_upper)
+        if upper <= 0:
+            return Bounds(upper ** exponent, lower ** exponent, include_upper, include_lower)
+        # Even power of an interval straddling zero: the minimum is reached at 0.
+        upper, include_upper = _highest([(lower ** exponent, include_lower), (upper ** exponent, include_upper)])
+        return Bounds(0, upper, True, include_upper)
+
+    def _compare(self, value: Any, certain: bool, impossible: bool) -> bool:
+        if certain:
+            return True
+        if impossible:
+            return False
+        raise IndeterminateComparison(f'cannot compare {self!r} with {value!r}')
+
+    def __lt__(self, value: Any) -> bool:
+        return self._compare(value, self.is_below(value), not (self.lower < value))
+
+    def __le__(self, value: Any) -> bool:
+        return self._compare(value, self.upper <= value, self.is_above(value))
+
+    def __gt__(self, value: Any) -> bool:
+        return self._compare(value, self.is_above(value), not (self.upper > value))
+
+    def __ge__(self, value: Any) -> bool:
+        return self._compare(value, self.lower >= value, self.is_below(value))
+
+    def __eq__(self, value: Any) -> bool:
+        if isinstance(value, Bounds):
+            return (self.lower, self.upper, self.include_lower, self.include_upper) == \
+                   (value.lower, value.upper, value.include_lower, value.include_upper)
+        if isinstance(value, (int, float)):
+            return self._compare(value, self.lower == self.upper == value, value not in self)
+        return NotImplemented
+
+    def __ne__(self, value: Any) -> bool:
+        equal = self.__eq__(value)
+        if equal is NotImplemented:
+            return NotImplemented
+        return not equal
+
+    def __hash__(self) -> int:
+        return hash((self.lower, self.upper, self.include_lower, self.include_upper))
+
+    def __bool__(self) -> bool:
+        raise IndeterminateComparison('the truth value of bounds is undecidable')
+
+
+def _monotone(function: Callable[[Any], Any], value: Bounds, increasing: bool = True) -> Bounds:
+    if increasing:
+        return Bounds(function(value.lower), function(value.upper), value.include_lower, value.include_upper)
+    return Bounds(function(value.upper), function(value.lower), value.include_upper, value.include_lower)
+
+
+def _clip_below(value: Bounds, minimum: Any, include_minimum: bool, name: str) -> Bounds:
+    if value.is_below(minimum) or (value.upper == minimum and not include_minimum):
+        raise ValueError(f'math domain error: {name} of {value!r}')
+    if value.lower < minimum or (value.lower == minimum and value.include_lower and not include_minimum):
+        return Bounds(minimum, value.upper, include_minimum and minimum in value, value.include_upper)
+    return value
+
+
+def sqrt(value: Any) -> Any:
+    if isinstance(value, Interval):
+        value = Bounds.from_interval(value)
+    if isinstance(value, Bounds):
+        return _monotone(math.sqrt, _clip_below(value, 0, True, 'sqrt'))
+    return math.sqrt(value)
+
+
+def exp(value: Any) -> Any:
+    if isinstance(value, Interval):
+        value = Bounds.from_interval(value)
+    if isinstance(value, Bounds):
+        return _monotone(math.exp, value)
+    return math.exp(value)
+
+
+def log(value: Any) -> Any:
+    if isinstance(value, Interval):
+        value = Bounds.from_interval(value)
+    if isinstance(value, Bounds):
+        value = _clip_below(value, 0, False, 'log')
+        return _monotone(lambda x: math.log(x) if x > 0 else -math.inf, value)
+    return math.log(value)
+
+
+def bound_expression(expression: mexpr.TermOrExpression, box: Mapping[str, Union[Interval, Bounds, Any]]) -> Bounds:
+    developed = expression.develop()
+    if isinstance(developed, mexpr.AbstractTerm):
+        developed = mexpr.Expression(developed)
+    box = {name: Bounds._coerce(value) for name, value in box.items()}
+
+    # Each power is bounded as a whole (x² over [-1;1] is [0;1], not [-1;1]), then the term products and the sum
+    # are bounded with plain interval arithmetic.
+    total = Bounds.point(0)
+    for node in developed._iter_nodes():
+        term = node.term
+        result = Bounds.point(term.multiplier)
+        for name, exponent in term.variables.items():
+            if name not in box:
+                raise KeyError(f'no interval given for {name}')
+            result = result * box[name] ** exponent
+        total = total + result
+    return total
@@ -1,7 +1,102 @@
 # -*- coding:Utf-8 -*-
 
+from bisect import bisect_right
+from itertools import chain
+import math
+
+
+# Sets that are provably discrete and bounded carry _ranges, a sorted list of disjoint, non-adjacent integer ranges,
+# on top of their membership function. Iteration, len, min, max and sum are computed from it.
+
+def _normalize(ranges):
+    result = []
+    for current in sorted((r for r in ranges if r), key=lambda r: r.start):
+        if result and current.start <= result[-1].stop:
+            if current.stop > result[-1].stop:
+                result[-1] = range(result[-1].start, current.stop)
+        else:
+            result.append(current)
+    return result
+
+
+def _intersection(ranges_1, ranges_2):
+    result = []
+    i = j = 0
+    while i < len(ranges_1) and j < len(ranges_2):
+        start = max(ranges_1[i].start, ranges_2[j].start)
+        stop = min(ranges_1[i].stop, ranges_2[j].stop)
+        if start < stop:
+            result.append(range(start, stop))
+        if ranges_1[i].stop < ranges_2[j].stop:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+def _difference(ranges_1, ranges_2):
+    result = []
+    j = 0
+    for current in ranges_1:
+        start = current.start
+        while j < len(ranges_2) and ranges_2[j].stop <= start:
+            j += 1
+        k = j
+        while k < len(ranges_2) and ranges_2[k].start < current.stop:
+            if ranges_2[k].start > start:
+                result.append(range(start, ranges_2[k].start))
+            start = max(start, ranges_2[k].stop)
+            k += 1
+        if start < current.stop:
+            result.append(range(start, current.stop))
+    return result
+
+
+def _span(a_set):
+    # Inclusive integer bounds (None when unbounded) of the integers of an Interval or an Integers set.
+    if isinstance(a_set, Integers):
+        return a_set.lower, a_set.upper
+    if isinstance(a_set, Interval):
+        lower = upper = None
+        if a_set.start != -math.inf:
+            lower = math.ceil(a_set.start)
+            if a_set.start_exclusiv and lower == a_set.start:
+                lower += 1
+        if a_set.stop != math.inf:
+            upper = math.floor(a_set.stop)
+            if a_set.stop_exclusiv and upper == a_set.stop:
+                upper -= 1
+        return lower, upper
+    return None
+
+
+def _span_intersection(span_1, span_2):
+    lower = span_1[0] if span_2[0] is None else span_2[0] if span_1[0] is None else max(span_1[0], span_2[0])
+    upper = span_1[1] if span_2[1] is None else span_2[1] if span_1[1] is None else min(span_1[1], span_2[1])
+    return lower, upper
+
+
+def _span_ranges(span, ranges):
+    # The span as ranges, with unbounded sides cut at the extent of the given ranges.
+    if not ranges:
+        return []
+    lower = ranges[0].start if span[0] is None else max(span[0], ranges[0].start)
+    upper = ranges[-1].stop - 1 if span[1] is None else min(span[1], ranges[-1].stop - 1)
+    return [range(lower, upper + 1)] if lower <= upper else []
+
+
+def _as_ranges(a_set, ranges):
+    if a_set._ranges is not None:
+        return a_set._ranges
+    span = _span(a_set)
+    if span is not None:
+        return _span_ranges(span, ranges)
+    return None
+
 
 class Set:
+    _ranges = None
+    
     def __init__(self, contains_function):        
         self.contains = contains_function
         
@@ -11,12 +106,20 @@ class Set:
     def __sub__(self, other_set):
         def contains(n):
             return (self.contains(n) and not other_set.contains(n))
-        return Set(contains)
+        result = Set(contains)
+        if self._ranges is not None:
+            other_ranges = _as_ranges(other_set, self._ranges)
+            if other_ranges is not None:
+                result._ranges = _difference(self._ranges, other_ranges)
+        return result
     
     def __or__(self, other_set):
         def contains(n):
             return (self.contains(n) or other_set.contains(n))
-        return Set(contains)
+        result = Set(contains)
+        if self._ranges is not None and other_set._ranges is not None:
+            result._ranges = _normalize(self._ranges + other_set._ranges)
+        return result
     
     def __invert__(self):
         def contains(n):
@@ -24,19 +127,124 @@ class Set:
         return Set(contains)
     
     def __and__(self, other_set):
+        if isinstance(self, Integers) or isinstance(other_set, Integers):
+            span_1, span_2 = _span(self), _span(other_set)
+            if span_1 is not None and span_2 is not None:
+                return Integers(*_span_intersection(span_1, span_2))
+        
         def contains(n):
             return (self.contains(n) and other_set.contains(n))
-        return Set(contains)
+        result = Set(contains)
+        if self._ranges is not None:
+            other_ranges = _as_ranges(other_set, self._ranges)
+            if other_ranges is not None:
+                result._ranges = _intersection(self._ranges, other_ranges)
+        elif other_set._ranges is not None:
+            own_ranges = _as_ranges(self, other_set._ranges)
+            if own_ranges is not None:
+                result._ranges = _intersection(own_ranges, other_set._ranges)
+        return result
+    
+    def is_discrete(self):
+        return self._ranges is not None
+    
+    def _checked_ranges(self):
+        if self._ranges is None:
+            raise TypeError('this set is not provably discrete and bounded')
+        return self._ranges
+    
+    def _counts(self):
+        # Cumulated sizes of the ranges, for O(log n) indexing.
+        counts = self.__dict__.get('_cumulated_counts')
+        if counts is None:
+            counts = [0]
+            for current in self._checked_ranges():
+                counts.append(counts[-1] + len(current))
+            self._cumulated_counts = counts
+        return counts
+    
+    def __iter__(self):
+        return chain.from_iterable(self._checked_ranges())
+    
+    def __reversed__(self):
+        return chain.from_iterable(reversed(current) for current in reversed(self._checked_ranges()))
+    
+    def __len__(self):
+        return self._counts()[-1]
+    
+    def __bool__(self):
+        return self._ranges is None or bool(self._ranges)
+    
+    def __getitem__(self, index):
+        counts = self._counts()
+        if index < 0:
+            index += counts[-1]
+        if not 0 <= index < counts[-1]:
+            raise IndexError('set index out of range')
+        position = bisect_right(counts, index) - 1
+        return self._ranges[position][index - counts[position]]
+    
+    def min(self):
+        ranges = self._checked_ranges()
+        if not ranges:
+            raise ValueError('min() of an empty set')
+        return ranges[0].start
+    
+    def max(self):
+        ranges = self._checked_ranges()
+        if not ranges:
+            raise ValueError('max() of an empty set')
+        return ranges[-1].stop - 1
+    
+    def sum(self):
+        return sum((current.start + current.stop - 1) * len(current) // 2 for current in self._checked_ranges())
+    
+    def iter_arrays(self, chunk_size=1 << 16, dtype=None):
+        import numpy as np
+        for current in self._checked_ranges():
+            for start in range(current.start, current.stop, chunk_size):
+                yield np.arange(start, min(start + chunk_size, current.stop), dtype=dtype or np.int64)
+    
+    def to_array(self, dtype=None):
+        import numpy as np
+        arrays = list(self.iter_arrays(dtype=dtype))
+        return np.concatenate(arrays) if arrays else np.empty(0, dtype=dtype or np.int64)
+
+
+class Integers(Set):
+    def __init__(self, lower=None, upper=None):
+        self.lower = lower
+        self.upper = upper
+        super().__init__(self.contains)
+        if lower is not None and upper is not None:
+            self._ranges = [range(lower, upper + 1)] if lower <= upper else []
+    
+    def contains(self, n):
+        return (isinstance(n, int) and (self.lower is None or self.lower <= n) and
+                (self.upper is None or n <= self.upper))
+    
+    def __repr__(self):
+        if self.lower is None and self.upper is None:
+            return 'ℤ'
+        if self.lower == 0 and self.upper is None:
+            return 'ℕ'
+        a = ']-inf' if self.lower is None else f'[{self.lower}'
+        b = 'inf[' if self.upper is None else f'{self.upper}]'
+        return f'{a};{b} ∩ ℤ'
+
 
 NULL = Set(lambda _: False)
+NULL._ranges = []
 REAL = Set(lambda n: isinstance(n, (int, float)))
-RELATIVE = Set(lambda n: isinstance(n, int))
-NATURAL = Set(lambda n: isinstance(n, int) and n > -1) 
+RELATIVE = Integers()
+NATURAL = Integers(0)
 
 class ListSet(Set):
     def __init__(self, container):
         self._container = container
         super().__init__(self.contains)
+        if all(type(value) is int for value in container):
+            self._ranges = _normalize(range(value, value + 1) for value in container)
         
     def contains(self, n):
         return n in self._container
@@ -74,6 +282,41 @@ class Interval(Set):
             con &= n <= self.stop
         
         return con
+    
+    # Set difference keeps the - operator, interval subtraction is written a + (-b).
+    def bounds(self):
+        from .intervals import Bounds
+        return Bounds.from_interval(self)
+    
+    def _arithmetic(self, operation, value):
+        result = operation(self.bounds(), value.bounds() if isinstance(value, Interval) else value)
+        if result is NotImplemented:
+            return NotImplemented
+        return result.to_interval()
+    
+    def __add__(self, value):
+        return self._arithmetic(lambda a, b: a.__add__(b), value)
+    
+    def __radd__(self, value):
+        return self._arithmetic(lambda a, b: a.__radd__(b), value)
+    
+    def __mul__(self, value):
+        return self._arithmetic(lambda a, b: a.__mul__(b), value)
+    
+    def __rmul__(self, value):
+        return self._arithmetic(lambda a, b: a.__rmul__(b), value)
+    
+    def __truediv__(self, value):
+        return self._arithmetic(lambda a, b: a.__truediv__(b), value)
+    
+    def __rtruediv__(self, value):
+        return self._arithmetic(lambda a, b: a.__rtruediv__(b), value)
+    
+    def __pow__(self, value):
+        return self._arithmetic(lambda a, b: a.__pow__(b), value)
+    
+    def __neg__(self):
+        return (-self.bounds()).to_interval()
         
 
 
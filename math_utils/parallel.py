@@ -0,0 +1,169 @@
+# -*- coding:Utf-8 -*-
+
+
+from . import expressions as mexpr
+from . import sparse
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, List, Optional, Tuple
+import os
+
+PARALLEL_THRESHOLD = 250000
+CHUNKS_PER_PROCESS = 4
+
+
+def merge(polynom_1: sparse.SparsePolynom, polynom_2: sparse.SparsePolynom) -> sparse.SparsePolynom:
+    order_key = sparse.order_key
+    result = []
+    i = j = 0
+    length_1 = len(polynom_1)
+    length_2 = len(polynom_2)
+    while i < length_1 and j < length_2:
+        monomial_1, coefficient_1 = polynom_1[i]
+        monomial_2, coefficient_2 = polynom_2[j]
+        if monomial_1 == monomial_2:
+            coefficient = coefficient_1 + coefficient_2
+            if coefficient != 0:
+                result.append((monomial_1, coefficient))
+            i += 1
+            j += 1
+        elif order_key(monomial_1) > order_key(monomial_2):
+            result.append(polynom_1[i])
+            i += 1
+        else:
+            result.append(polynom_2[j])
+            j += 1
+    result.extend(polynom_1[i:])
+    result.extend(polynom_2[j:])
+    return result
+
+
+def _multiply_chunk(arguments: tuple) -> sparse.SparsePolynom:
+    return sparse.multiply(*arguments)
+
+
+def tree_reduce(parts: List[sparse.SparsePolynom]) -> sparse.SparsePolynom:
+    # Merges are linear and run here: sending both partial sums to a worker and the result back would cost more
+    # than the merge itself. Partial sums are always paired in the same order, so the result is deterministic.
+    while len(parts) > 1:
+        merged = [merge(parts[i], parts[i + 1]) for i in range(0, len(parts) - 1, 2)]
+        if len(parts) % 2:
+            merged.append(parts[-1])
+        parts = merged
+    return parts[0] if parts else []
+
+
+def _chunk_tasks(polynom_1: sparse.SparsePolynom, polynom_2: sparse.SparsePolynom, multiplier: Any,
+                 processes: int) -> List[tuple]:
+    if len(polynom_1) < len(polynom_2):
+        polynom_1, polynom_2 = polynom_2, polynom_1
+    chunks = min(processes * CHUNKS_PER_PROCESS, len(polynom_1))
+    size = -(-len(polynom_1) // chunks)
+    return [(polynom_1[start:start + size], polynom_2, multiplier) for start in range(0, len(polynom_1), size)]
+
+
+def multiply(polynom_1: sparse.SparsePolynom, polynom_2: sparse.SparsePolynom, multiplier: Any = 1,
+             executor: Optional[Executor] = None, processes: int = 1,
+             threshold: int = PARALLEL_THRESHOLD) -> sparse.SparsePolynom:
+    if executor is None or processes <= 1 or len(polynom_1) * len(polynom_2) < threshold:
+        return sparse.multiply(polynom_1, polynom_2, multiplier)
+    return tree_reduce(list(executor.map(_multiply_chunk, _chunk_tasks(polynom_1, polynom_2, multiplier, processes))))
+
+
+def _factors(term: mexpr.AbstractTerm) -> Tuple[Any, List[mexpr.TermOrExpression]]:
+    # Nested products are flattened into one chain of factors, so (a)(b)(c)(d) is reduced as a balanced tree
+    # instead of a left-deep sequence of products.
+    if isinstance(term, mexpr.ExpressionMultiplicationTerm):
+        multiplier = term.multiplier
+        factors = []
+        for expr in (term.expr_1, term.expr_2):
+            if expr.rest_of_expression is None and isinstance(expr.term, mexpr.ExpressionMultiplicationTerm):
+                sub_multiplier, sub_factors = _factors(expr.term)
+                multiplier *= sub_multiplier
+                factors.extend(sub_factors)
+            else:
+                factors.append(expr)
+        return multiplier, factors
+    return 1, [term]
+
+
+class ParallelDeveloper:
+    def __init__(self, processes: Optional[int] = None, threshold: int = PARALLEL_THRESHOLD,
+                 executor: Optional[Executor] = None) -> None:
+        self.processes = processes or os.cpu_count() or 1
+        self.threshold = threshold
+        self._executor = executor
+        self._owns_executor = executor is None
+
+    @property
+    def executor(self) -> Executor:
+        # The pool is only started once a product is large enough to be split.
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.processes)
+        return self._executor
+
+    def close(self) -> None:
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self) -> 'ParallelDeveloper':
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def develop(self, expression: mexpr.TermOrExpression) -> mexpr.TermOrExpression:
+        if isinstance(expression, mexpr.AbstractExpression):
+            terms = []
+            for node in expression._iter_nodes():
+                developed = self.develop(node.term)
+                if isinstance(developed, mexpr.AbstractExpression):
+                    terms.extend(developed_node.term for developed_node in developed._iter_nodes())
+                else:
+                    terms.append(developed)
+            return mexpr.Expression.from_terms(terms).develop()
+
+        if not isinstance(expression, mexpr.ExpressionMultiplicationTerm):
+            return expression.develop()
+
+        multiplier, factors = _factors(expression)
+        developed = [self.develop(factor) for factor in factors]
+        names = sparse.variable_names(*developed)
+        polynoms = [sparse.from_expression(factor, names)[1] for factor in developed]
+        while len(polynoms) > 1:
+            products = self.multiply_pairs([(polynoms[i], polynoms[i + 1]) for i in range(0, len(polynoms) - 1, 2)])
+            if len(polynoms) % 2:
+                products.append(polynoms[-1])
+            polynoms = products
+        product = polynoms[0]
+        if multiplier != 1:
+            product = [(monomial, coefficient * multiplier) for monomial, coefficient in product if coefficient * multiplier != 0]
+        return mexpr._single_term_or_expression(sparse.to_terms(names, product))
+
+    def multiply(self, polynom_1: sparse.SparsePolynom, polynom_2: sparse.SparsePolynom) -> sparse.SparsePolynom:
+        return self.multiply_pairs([(polynom_1, polynom_2)])[0]
+
+    def multiply_pairs(self, pairs: List[Tuple[sparse.SparsePolynom, sparse.SparsePolynom]]) -> List[sparse.SparsePolynom]:
+        # The chunks of every large product are submitted before any result is awaited, so the products of a level
+        # share the pool; small products are computed here meanwhile.
+        pending = []
+        for polynom_1, polynom_2 in pairs:
+            if self.processes <= 1 or len(polynom_1) * len(polynom_2) < self.threshold:
+                pending.append(None)
+            else:
+                pending.append([self.executor.submit(_multiply_chunk, task)
+                                for task in _chunk_tasks(polynom_1, polynom_2, 1, self.processes)])
+
+        products = []
+        for (polynom_1, polynom_2), futures in zip(pairs, pending):
+            if futures is None:
+                products.append(sparse.multiply(polynom_1, polynom_2))
+            else:
+                products.append(tree_reduce([future.result() for future in futures]))
+        return products
+
+
+def develop_parallel(expression: mexpr.TermOrExpression, processes: Optional[int] = None,
+                     threshold: int = PARALLEL_THRESHOLD, executor: Optional[Executor] = None) -> mexpr.TermOrExpression:
+    with ParallelDeveloper(processes, threshold, executor) as developer:
+        return developer.develop(expression)
@@ -3,10 +3,15 @@
 
 from . import expressions as mexpr
 from . import math_sets
-from typing import Any, Union, Sequence, Mapping, Set, AbstractSet
+from .exceptions import SerializationError
+from itertools import islice
+from operator import add
+from typing import Any, Union, Sequence, Mapping, Set, AbstractSet, Iterable, Iterator, Optional
 
 
 class PolynomTerm(mexpr.AbstractTerm):
+    __slots__ = ('_term',)
+    
     def __init__(self, term: mexpr.AbstractTerm) -> None:
         if not term.is_polynom_term():
             raise ValueError('this term is not valid for a polynom')
@@ -35,3 +40,146 @@ class PolynomTerm(mexpr.AbstractTerm):
         return value * self._term
 
 
+def to_coefficients(expression: mexpr.AbstractExpression, variable: str) -> Union[None, list]:
+    coefficients = {}
+    names = (variable,)
+    for term in expression.get_all_terms():
+        if not isinstance(term, mexpr.Term):
+            return None
+        variables = term.variables
+        if variables.names == names:
+            exponent = variables.exponents[0]
+            if exponent < 0:
+                return None
+        elif variables.names:
+            return None
+        else:
+            exponent = 0
+        coefficients[exponent] = coefficients.get(exponent, 0) + term.multiplier
+        
+    vector = [0] * (max(coefficients) + 1)
+    for exponent, coefficient in coefficients.items():
+        vector[exponent] = coefficient
+    return vector
+
+
+def from_coefficients(coefficients: Sequence[Any], variable: str) -> mexpr.AbstractExpression:
+    names = (variable,)
+    return mexpr.Expression.from_terms([mexpr.Term.from_variables(coefficient, mexpr.Variables.from_tuples(names, (exponent,))
+                                                                  if exponent else mexpr.Variables())
+                                        for exponent, coefficient in reversed(list(enumerate(coefficients)))
+                                        if coefficient != 0])
+
+
+def derive_coefficients(coefficients: Sequence[Any]) -> list:
+    return [exponent * coefficients[exponent] for exponent in range(1, len(coefficients))]
+
+
+def integrate_coefficients(coefficients: Sequence[Any]) -> list:
+    return [0] + [mexpr.divide(coefficient, exponent + 1) for exponent, coefficient in enumerate(coefficients)]
+
+
+
+
+class MappedPolynom:
+    block_size = 1 << 16
+    
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.variable, self._view, side_table = serialization.map_coefficients(path)
+        if side_table:
+            self._view.release()
+            raise SerializationError('memory-mapped polynoms need 64-bit coefficients')
+        self.float_coefficients = self._view.format == 'd'
+    
+    @classmethod
+    def from_coefficients(cls, coefficients: Iterable[Any], path: str, variable: str = 'x',
+                          float_coefficients: bool = False, block_size: Optional[int] = None) -> 'MappedPolynom':
+        block_size = block_size or cls.block_size
+        iterator = iter(coefficients)
+        with open(path, 'wb') as file:
+            with serialization.ExpressionWriter(file, (variable,), dense=True, float_coefficients=float_coefficients,
+                                                chunk_size=block_size) as writer:
+                block = list(islice(iterator, block_size))
+                while block:
+                    writer.write_coefficients(block)
+                    block = list(islice(iterator, block_size))
+        return cls(path)
+    
+    @classmethod
+    def from_expression(cls, expression: mexpr.AbstractExpression, path: str, variable: str) -> 'MappedPolynom':
+        coefficients = to_coefficients(expression, variable)
+        if coefficients is None:
+            raise ValueError(f'this expression is not a polynom in {variable}')
+        return cls.from_coefficients(coefficients, path, variable,
+                                     all(isinstance(coefficient, float) for coefficient in coefficients))
+    
+    def close(self) -> None:
+        self._view.release()
+    
+    def __enter__(self) -> 'MappedPolynom':
+        return self
+    
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+    
+    def __len__(self) -> int:
+        return len(self._view)
+    
+    @property
+    def degree(self) -> int:
+        return len(self._view) - 1
+    
+    def __getitem__(self, exponent: int) -> Any:
+        if 0 <= exponent < len(self._view):
+            return self._view[exponent]
+        return 0
+    
+    def iter_blocks(self, start: int = 0, stop: Optional[int] = None) -> Iterator[list]:
+        # Only one block of coefficients is turned into Python numbers at a time, the rest stays in the page cache.
+        stop = len(self._view) if stop is None else min(stop, len(self._view))
+        for block_start in range(start, stop, self.block_size):
+            yield self._view[block_start:min(block_start + self.block_size, stop)].tolist()
+    
+    def coefficients(self) -> Iterator[Any]:
+        for block in self.iter_blocks():
+            yield from block
+    
+    def evaluate(self, x: Any) -> Any:
+        result = 0
+        for block_end in range(len(self._view), 0, -self.block_size):
+            block = self._view[max(block_end - self.block_size, 0):block_end].tolist()
+            for coefficient in reversed(block):
+                result = result * x + coefficient
+        return result
+    
+    def _iter_sum(self, polynom: 'MappedPolynom') -> Iterator[Any]:
+        length = max(len(self), len(polynom))
+        for start in range(0, length, self.block_size):
+            stop = min(start + self.block_size, length)
+            block_1 = self._view[start:stop].tolist() if start < len(self) else []
+            block_2 = polynom._view[start:stop].tolist() if start < len(polynom) else []
+            if len(block_1) < len(block_2):
+                block_1, block_2 = block_2, block_1
+            yield from map(add, block_1, block_2)
+            yield from block_1[len(block_2):]
+    
+    def add(self, polynom: 'MappedPolynom', path: str) -> 'MappedPolynom':
+        return MappedPolynom.from_coefficients(self._iter_sum(polynom), path, self.variable,
+                                               self.float_coefficients or polynom.float_coefficients, self.block_size)
+    
+    def scale(self, factor: Any, path: str) -> 'MappedPolynom':
+        return MappedPolynom.from_coefficients((coefficient * factor for coefficient in self.coefficients()), path,
+                                               self.variable, self.float_coefficients or isinstance(factor, float),
+                                               self.block_size)
+    
+    def derive(self, path: str) -> 'MappedPolynom':
+        derivative = (exponent * coefficient
+                      for exponent, coefficient in enumerate(self.coefficients()) if exponent > 0)
+        return MappedPolynom.from_coefficients(derivative, path, self.variable, self.float_coefficients, self.block_size)
+    
+    def to_expression(self) -> mexpr.AbstractExpression:
+        return from_coefficients(list(self.coefficients()), self.variable)
+
+
+from . import serialization
@@ -0,0 +1,356 @@
+# -*- coding:Utf-8 -*-
+
+
+from . import expressions as mexpr
+from . import polynoms
+from .exceptions import SerializationError
+from array import array
+from fractions import Fraction
+from typing import Any, BinaryIO, Iterator, List, Optional, Sequence, Tuple
+import io
+import mmap
+import struct
+import sys
+
+MAGIC = b'MUEX'
+VERSION = 1
+
+DENSE = 1
+FLOAT_COEFFICIENTS = 2
+
+DENSE_MIN_DENSITY = 0.5
+
+INT64_MIN = -2 ** 63
+INT64_MAX = 2 ** 63 - 1
+
+_HEADER = struct.Struct('<4sHHI')
+_CHUNK = struct.Struct('<I')
+_COUNT = struct.Struct('<Q')
+_SIDE_ENTRY = struct.Struct('<IBI')
+
+_INT, _FRACTION, _FLOAT = range(3)
+
+
+def _to_little_endian(values: array) -> bytes:
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_little_endian(typecode: str, data: Any) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+def _encode_int(value: int) -> bytes:
+    return value.to_bytes((value.bit_length() + 8) // 8, 'little', signed=True)
+
+
+def _encode_coefficient(value: Any) -> Tuple[int, bytes]:
+    if isinstance(value, int):
+        return _INT, _encode_int(value)
+    if isinstance(value, Fraction):
+        numerator = _encode_int(value.numerator)
+        return _FRACTION, struct.pack('<I', len(numerator)) + numerator + _encode_int(value.denominator)
+    if isinstance(value, float):
+        return _FLOAT, struct.pack('<d', value)
+    raise SerializationError(f'cannot serialize a {type(value).__name__} coefficient')
+
+
+def _decode_coefficient(kind: int, data: bytes) -> Any:
+    if kind == _INT:
+        return int.from_bytes(data, 'little', signed=True)
+    if kind == _FRACTION:
+        length, = struct.unpack_from('<I', data)
+        numerator = int.from_bytes(data[4:4 + length], 'little', signed=True)
+        return Fraction(numerator, int.from_bytes(data[4 + length:], 'little', signed=True))
+    if kind == _FLOAT:
+        return struct.unpack('<d', data)[0]
+    raise SerializationError(f'unknown coefficient kind {kind}')
+
+
+def _write_side_table(file: BinaryIO, side_table: List[Tuple[int, Any]]) -> None:
+    file.write(_CHUNK.pack(len(side_table)))
+    for index, value in side_table:
+        kind, data = _encode_coefficient(value)
+        file.write(_SIDE_ENTRY.pack(index, kind, len(data)))
+        file.write(data)
+
+
+def _read_side_table(file: BinaryIO) -> List[Tuple[int, Any]]:
+    count, = _CHUNK.unpack(_read_exactly(file, _CHUNK.size))
+    side_table = []
+    for _ in range(count):
+        index, kind, length = _SIDE_ENTRY.unpack(_read_exactly(file, _SIDE_ENTRY.size))
+        side_table.append((index, _decode_coefficient(kind, _read_exactly(file, length))))
+    return side_table
+
+
+def _read_exactly(file: BinaryIO, size: int) -> bytes:
+    data = file.read(size)
+    if len(data) != size:
+        raise SerializationError('unexpected end of file')
+    return data
+
+
+def _split_coefficients(coefficients: Sequence[Any], typecode: str) -> Tuple[array, List[Tuple[int, Any]]]:
+    if typecode == 'd' or all(type(coefficient) is int for coefficient in coefficients):
+        try:
+            return array(typecode, coefficients), []
+        except OverflowError:
+            pass
+    packed = array(typecode, bytes(8 * len(coefficients)))
+    side_table = []
+    for i, coefficient in enumerate(coefficients):
+        if typecode == 'd':
+            packed[i] = coefficient
+        elif isinstance(coefficient, int) and INT64_MIN <= coefficient <= INT64_MAX:
+            packed[i] = coefficient
+        else:
+            side_table.append((i, coefficient))
+    return packed, side_table
+
+
+class ExpressionWriter:
+    def __init__(self, file: BinaryIO, variables: Sequence[str], dense: bool = False,
+                 float_coefficients: bool = False, chunk_size: int = 65536) -> None:
+        self.file = file
+        self.variables = tuple(sorted(variables))
+        self.dense = dense
+        self.chunk_size = chunk_size
+        self.typecode = 'd' if float_coefficients else 'q'
+        self._index = {name: i for i, name in enumerate(self.variables)}
+        self._positions = {}
+        self._exponents = array('i')
+        self._coefficients = []
+        self._count = 0
+        self._side_table = []
+        self._closed = False
+
+        if dense and len(self.variables) != 1:
+            raise SerializationError('dense files hold univariate polynomials')
+
+        flags = (DENSE if dense else 0) | (FLOAT_COEFFICIENTS if float_coefficients else 0)
+        header = bytearray(_HEADER.pack(MAGIC, VERSION, flags, len(self.variables)))
+        for name in self.variables:
+            encoded = name.encode('utf8')
+            header += struct.pack('<H', len(encoded)) + encoded
+        if dense:
+            header += bytes(-(len(header) + _COUNT.size) % 8)
+            self._count_position = file.tell() + len(header)
+            header += _COUNT.pack(0)
+        file.write(header)
+
+    def __enter__(self) -> 'ExpressionWriter':
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
+    def write_coefficients(self, coefficients: Sequence[Any]) -> None:
+        if not self.dense:
+            raise SerializationError('write_coefficients is only available for dense files')
+        for start in range(0, len(coefficients), self.chunk_size):
+            block = coefficients[start:start + self.chunk_size]
+            packed, side_table = _split_coefficients(block, self.typecode)
+            self._side_table.extend((self._count + i, value) for i, value in side_table)
+            self.file.write(_to_little_endian(packed))
+            self._count += len(block)
+
+    def write_term(self, term: mexpr.AbstractTerm) -> None:
+        if not isinstance(term, mexpr.Term):
+            raise SerializationError('only developed expressions can be serialized')
+        if term.is_null():
+            return
+        if self.dense:
+            exponent = term.variables[self.variables[0]]
+            if exponent < self._count:
+                raise SerializationError('dense terms must be written in increasing degree')
+            self.write_coefficients([0] * (exponent - self._count) + [term.multiplier])
+            return
+
+        variables = term.variables
+        positions = self._positions.get(variables.names)
+        if positions is None:
+            try:
+                positions = self._positions[variables.names] = tuple(self._index[name] for name in variables.names)
+            except KeyError as error:
+                raise SerializationError(f'variable {error} was not declared') from None
+
+        row = [0] * len(self.variables)
+        for position, exponent in zip(positions, variables.exponents):
+            row[position] = exponent
+        self._exponents.extend(row)
+        self._coefficients.append(term.multiplier)
+        if len(self._coefficients) >= self.chunk_size:
+            self._flush()
+
+    def write_terms(self, terms: Iterator[mexpr.AbstractTerm]) -> None:
+        for term in terms:
+            self.write_term(term)
+
+    def _flush(self) -> None:
+        if not self._coefficients:
+            return
+        packed, side_table = _split_coefficients(self._coefficients, self.typecode)
+        self.file.write(_CHUNK.pack(len(self._coefficients)))
+        self.file.write(_to_little_endian(self._exponents))
+        self.file.write(_to_little_endian(packed))
+        _write_side_table(self.file, side_table)
+        self._exponents = array('i')
+        self._coefficients = []
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        if self.dense:
+            _write_side_table(self.file, self._side_table)
+            end = self.file.tell()
+            self.file.seek(self._count_position)
+            self.file.write(_COUNT.pack(self._count))
+            self.file.seek(end)
+        else:
+            self._flush()
+            self.file.write(_CHUNK.pack(0))
+
+
+class ExpressionReader:
+    def __init__(self, file: BinaryIO) -> None:
+        self.file = file
+        magic, version, self.flags, variable_count = _HEADER.unpack(_read_exactly(file, _HEADER.size))
+        if magic != MAGIC:
+            raise SerializationError('not a serialized math_utils expression')
+        if version > VERSION:
+            raise SerializationError(f'format version {version} is newer than the supported version {VERSION}')
+
+        names = []
+        size = _HEADER.size
+        for _ in range(variable_count):
+            length, = struct.unpack('<H', _read_exactly(file, 2))
+            names.append(_read_exactly(file, length).decode('utf8'))
+            size += 2 + length
+        self.variables = tuple(names)
+        self.typecode = 'd' if self.flags & FLOAT_COEFFICIENTS else 'q'
+
+        if self.dense:
+            _read_exactly(file, -(size + _COUNT.size) % 8)
+            self.count, = _COUNT.unpack(_read_exactly(file, _COUNT.size))
+            self.data_offset = size + -(size + _COUNT.size) % 8 + _COUNT.size
+
+    @property
+    def dense(self) -> bool:
+        return bool(self.flags & DENSE)
+
+    def iter_chunks(self) -> Iterator[Tuple[array, list]]:
+        if self.dense:
+            coefficients = list(_from_little_endian(self.typecode, _read_exactly(self.file, 8 * self.count)))
+            for index, value in _read_side_table(self.file):
+                coefficients[index] = value
+            yield None, coefficients
+            return
+
+        width = len(self.variables)
+        while True:
+            count, = _CHUNK.unpack(_read_exactly(self.file, _CHUNK.size))
+            if count == 0:
+                return
+            exponents = _from_little_endian('i', _read_exactly(self.file, 4 * count * width))
+            coefficients = list(_from_little_endian(self.typecode, _read_exactly(self.file, 8 * count)))
+            for index, value in _read_side_table(self.file):
+                coefficients[index] = value
+            yield exponents, coefficients
+
+    def iter_terms(self) -> Iterator[mexpr.Term]:
+        width = len(self.variables)
+        for exponents, coefficients in self.iter_chunks():
+            if exponents is None:
+                names = self.variables
+                for exponent, coefficient in enumerate(coefficients):
+                    if coefficient != 0:
+                        variables = mexpr.Variables.from_tuples(names, (exponent,)) if exponent else mexpr.Variables()
+                        yield mexpr.Term.from_variables(coefficient, variables)
+                continue
+
+            for i, coefficient in enumerate(coefficients):
+                row = exponents[i * width:(i + 1) * width]
+                names = tuple(name for name, exponent in zip(self.variables, row) if exponent)
+                yield mexpr.Term.from_variables(coefficient, mexpr.Variables.from_tuples(names, tuple(exponent for exponent in row if exponent)))
+
+
+def _density(expression: mexpr.AbstractExpression, variable: str) -> Optional[float]:
+    # Terms per coefficient of the dense layout, None when the expression is not a polynom in variable.
+    names = (variable,)
+    terms = 0
+    degree = 0
+    for term in expression.get_all_terms():
+        if not isinstance(term, mexpr.Term):
+            return None
+        variables = term.variables
+        if variables.names == names:
+            exponent = variables.exponents[0]
+            if exponent < 0:
+                return None
+            degree = max(degree, exponent)
+        elif variables.names:
+            return None
+        terms += 1
+    return terms / (degree + 1)
+
+
+def dump(expression: mexpr.TermOrExpression, file: BinaryIO, dense: Any = None) -> None:
+    if isinstance(expression, mexpr.AbstractTerm):
+        expression = mexpr.Expression(expression)
+    if not all(isinstance(term, mexpr.Term) for term in expression.get_all_terms()):
+        expression = expression.develop()
+        if isinstance(expression, mexpr.AbstractTerm):
+            expression = mexpr.Expression(expression)
+
+    variables = sorted(expression.variable_names)
+    if dense is None:
+        # A dense coefficient costs about half a sparse term: below that density, sparse files are smaller.
+        density = _density(expression, variables[0]) if len(variables) == 1 else None
+        dense = density is not None and density >= DENSE_MIN_DENSITY
+    if dense:
+        coefficients = polynoms.to_coefficients(expression, variables[0])
+        if coefficients is None:
+            raise SerializationError('dense files hold univariate polynomials')
+        float_coefficients = all(isinstance(coefficient, float) for coefficient in coefficients)
+        with ExpressionWriter(file, variables, dense=True, float_coefficients=float_coefficients) as writer:
+            writer.write_coefficients(coefficients)
+    else:
+        with ExpressionWriter(file, variables) as writer:
+            writer.write_terms(expression.get_all_terms())
+
+
+def dumps(expression: mexpr.TermOrExpression, dense: Any = None) -> bytes:
+    file = io.BytesIO()
+    dump(expression, file, dense)
+    return file.getvalue()
+
+
+def load(file: BinaryIO) -> mexpr.AbstractExpression:
+    return mexpr.Expression.from_terms(list(ExpressionReader(file).iter_terms()))
+
+
+def loads(data: bytes) -> mexpr.AbstractExpression:
+    return load(io.BytesIO(data))
+
+
+def map_coefficients(path: str) -> Tuple[str, memoryview, list]:
+    with open(path, 'rb') as file:
+        reader = ExpressionReader(file)
+        if not reader.dense:
+            raise SerializationError('only dense files can be memory-mapped')
+        file.seek(reader.data_offset + 8 * reader.count)
+        side_table = _read_side_table(file)
+        mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if sys.byteorder == 'big':
+        raise SerializationError('memory-mapped reads require a little-endian machine')
+    view = memoryview(mapping)[reader.data_offset:reader.data_offset + 8 * reader.count].cast(reader.typecode)
+    return reader.variables[0], view, side_table
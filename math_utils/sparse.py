@@ -0,0 +1,280 @@
+# -*- coding:Utf-8 -*-
+
+
+from . import expressions as mexpr
+from itertools import compress
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+import heapq
+
+Monomial = Tuple[int, ...]
+SparsePolynom = List[Tuple[Monomial, Any]]
+
+DENSE_THRESHOLD = 1.0
+
+
+def order_key(monomial: Monomial) -> tuple:
+    return (sum(monomial), monomial)
+
+
+def variable_names(*expressions: mexpr.TermOrExpression) -> tuple:
+    names = set()
+    for expression in expressions:
+        names.update(expression.variable_names)
+    return tuple(sorted(names))
+
+
+def from_expression(expression: mexpr.TermOrExpression, names: Sequence[str] = None) -> Tuple[tuple, SparsePolynom]:
+    if isinstance(expression, mexpr.AbstractTerm):
+        expression = mexpr.Expression(expression)
+    if names is None:
+        names = variable_names(expression)
+    index = {name: i for i, name in enumerate(names)}
+
+    coefficients: Dict[Monomial, Any] = {}
+    positions_cache = {}
+    width = len(names)
+    for node in expression._iter_nodes():
+        term = node.term
+        if not isinstance(term, mexpr.Term):
+            raise TypeError('only developed expressions can be converted to sparse polynoms')
+        variables = term.variables
+        positions = positions_cache.get(variables.names)
+        if positions is None:
+            positions = positions_cache[variables.names] = tuple(index[name] for name in variables.names)
+        row = [0] * width
+        for position, exponent in zip(positions, variables.exponents):
+            row[position] = exponent
+        monomial = tuple(row)
+        coefficients[monomial] = coefficients.get(monomial, 0) + term.multiplier
+
+    polynom = [(monomial, coefficient) for monomial, coefficient in coefficients.items() if coefficient != 0]
+    polynom.sort(key=lambda item: order_key(item[0]), reverse=True)
+    return names, polynom
+
+
+def to_terms(names: tuple, polynom: SparsePolynom) -> List[mexpr.Term]:
+    terms = []
+    empty = mexpr.Variables()
+    from_tuples = mexpr.Variables.from_tuples
+    from_variables = mexpr.Term.from_variables
+    for monomial, coefficient in polynom:
+        if any(monomial):
+            variables = from_tuples(tuple(compress(names, monomial)), tuple(filter(None, monomial)))
+        else:
+            variables = empty
+        terms.append(from_variables(coefficient, variables))
+    return terms
+
+
+def to_expression(names: tuple, polynom: SparsePolynom) -> mexpr.AbstractExpression:
+    return mexpr.Expression.from_terms(to_terms(names, polynom))
+
+
+class _Packing:
+    # Exponents are shifted to be non-negative and packed into the bit fields of a single int, with the total
+    # degree in the most significant field: monomial products become int additions and the graded order an
+    # int comparison.
+    def __init__(self, polynom_1: SparsePolynom, polynom_2: SparsePolynom) -> None:
+        columns_1 = list(zip(*(monomial for monomial, _ in polynom_1)))
+        columns_2 = list(zip(*(monomial for monomial, _ in polynom_2)))
+        self.width = len(columns_1)
+        self.shift_1 = tuple(min(column) for column in columns_1)
+        self.shift_2 = tuple(min(column) for column in columns_2)
+        self.shift = tuple(map(sum, zip(self.shift_1, self.shift_2)))
+        degree = (max(sum(monomial) for monomial, _ in polynom_1) - sum(self.shift_1) +
+                  max(sum(monomial) for monomial, _ in polynom_2) - sum(self.shift_2))
+        self.bits = max(degree.bit_length(), 1)
+        self.mask = (1 << self.bits) - 1
+        self.positions = tuple(self.bits * i for i in reversed(range(self.width)))
+        self.box = 1
+        for column_1, column_2 in zip(columns_1, columns_2):
+            self.box *= max(column_1) - min(column_1) + max(column_2) - min(column_2) + 1
+
+    def pack(self, polynom: SparsePolynom, shift: Monomial) -> List[Tuple[int, Any]]:
+        bits = self.bits
+        packed = []
+        for monomial, coefficient in polynom:
+            key = 0
+            degree = 0
+            for exponent, offset in zip(monomial, shift):
+                exponent -= offset
+                degree += exponent
+                key = (key << bits) | exponent
+            packed.append((key | (degree << (bits * self.width)), coefficient))
+        return packed
+
+    def unpack(self, key: int) -> Monomial:
+        mask = self.mask
+        return tuple([((key >> position) & mask) + offset for position, offset in zip(self.positions, self.shift)])
+
+
+def density(polynom_1: SparsePolynom, polynom_2: SparsePolynom) -> float:
+    if not polynom_1 or not polynom_2:
+        return 0.0
+    return len(polynom_1) * len(polynom_2) / _Packing(polynom_1, polynom_2).box
+
+
+def _multiply_heap(packed_1: List[Tuple[int, Any]], packed_2: List[Tuple[int, Any]]) -> List[Tuple[int, Any]]:
+    if len(packed_1) > len(packed_2):
+        packed_1, packed_2 = packed_2, packed_1
+    length_1 = len(packed_1)
+    length_2 = len(packed_2)
+    heappush = heapq.heappush
+    heappop = heapq.heappop
+
+    # Johnson's method: one heap entry per term of the shortest operand, each walking along the other operand.
+    # Row i + 1 only enters the heap once row i has produced its largest product.
+    heap = [(-(packed_1[0][0] + packed_2[0][0]), 0, 0)]
+    result = []
+    while heap:
+        key = heap[0][0]
+        coefficient = 0
+        while heap and heap[0][0] == key:
+            _, i, j = heappop(heap)
+            coefficient += packed_1[i][1] * packed_2[j][1]
+            if j + 1 < length_2:
+                heappush(heap, (-(packed_1[i][0] + packed_2[j + 1][0]), i, j + 1))
+            if j == 0 and i + 1 < length_1:
+                heappush(heap, (-(packed_1[i + 1][0] + packed_2[0][0]), i + 1, 0))
+        if coefficient != 0:
+            result.append((-key, coefficient))
+    return result
+
+
+def iter_multiply(polynom_1: SparsePolynom, polynom_2: SparsePolynom, multiplier: Any = 1, ascending: bool = False,
+                  max_degree: int = None) -> Iterator[Tuple[Monomial, Any]]:
+    # Streaming variant of the heap method: both operands are sorted in the requested direction and products are
+    # yielded one monomial at a time, so the caller can stop after the leading terms. Monomials above max_degree
+    # are skipped, and in ascending order the walk stops at the first of them.
+    if not polynom_1 or not polynom_2 or multiplier == 0:
+        return
+    packing = _Packing(polynom_1, polynom_2)
+    packed_1 = packing.pack(polynom_1, packing.shift_1)
+    packed_2 = packing.pack(polynom_2, packing.shift_2)
+    if len(packed_1) > len(packed_2):
+        packed_1, packed_2 = packed_2, packed_1
+    length_1 = len(packed_1)
+    length_2 = len(packed_2)
+    sign = 1 if ascending else -1
+    degree_shift = packing.bits * packing.width
+    degree_offset = sum(packing.shift)
+    heappush = heapq.heappush
+    heappop = heapq.heappop
+    unpack = packing.unpack
+
+    heap = [(sign * (packed_1[0][0] + packed_2[0][0]), 0, 0)]
+    while heap:
+        key = heap[0][0]
+        too_high = max_degree is not None and ((sign * key) >> degree_shift) + degree_offset > max_degree
+        if too_high and ascending:
+            return
+        coefficient = 0
+        while heap and heap[0][0] == key:
+            _, i, j = heappop(heap)
+            coefficient += packed_1[i][1] * packed_2[j][1]
+            if j + 1 < length_2:
+                heappush(heap, (sign * (packed_1[i][0] + packed_2[j + 1][0]), i, j + 1))
+            if j == 0 and i + 1 < length_1:
+                heappush(heap, (sign * (packed_1[i + 1][0] + packed_2[0][0]), i + 1, 0))
+        if coefficient != 0 and not too_high:
+            yield unpack(sign * key), coefficient * multiplier
+
+
+def _multiply_dict(packed_1: List[Tuple[int, Any]], packed_2: List[Tuple[int, Any]]) -> List[Tuple[int, Any]]:
+    coefficients: Dict[int, Any] = {}
+    get = coefficients.get
+    for key_1, coefficient_1 in packed_1:
+        for key_2, coefficient_2 in packed_2:
+            key = key_1 + key_2
+            coefficients[key] = get(key, 0) + coefficient_1 * coefficient_2
+    return sorted(((key, coefficient) for key, coefficient in coefficients.items() if coefficient != 0), reverse=True)
+
+
+def multiply(polynom_1: SparsePolynom, polynom_2: SparsePolynom, multiplier: Any = 1, method: str = None) -> SparsePolynom:
+    if not polynom_1 or not polynom_2 or multiplier == 0:
+        return []
+    packing = _Packing(polynom_1, polynom_2)
+    if method is None:
+        method = 'dict' if len(polynom_1) * len(polynom_2) >= DENSE_THRESHOLD * packing.box else 'heap'
+    if method == 'heap':
+        function = _multiply_heap
+    elif method == 'dict':
+        function = _multiply_dict
+    else:
+        raise ValueError(f"unknown multiplication method {method!r}, expected 'heap' or 'dict'")
+
+    product = function(packing.pack(polynom_1, packing.shift_1), packing.pack(polynom_2, packing.shift_2))
+    unpack = packing.unpack
+    if multiplier == 1:
+        return [(unpack(key), coefficient) for key, coefficient in product]
+    return [(unpack(key), coefficient * multiplier) for key, coefficient in product]
+
+
+def _binomial_power(polynom: SparsePolynom, exponent: int) -> SparsePolynom:
+    # Both monomials are distinct and the graded order is compatible with monomial products, so the k-th term of
+    # the binomial expansion is strictly smaller than the previous one and no sorting is needed.
+    (monomial_1, coefficient_1), (monomial_2, coefficient_2) = polynom
+    powers_1 = [1]
+    powers_2 = [1]
+    for _ in range(exponent):
+        powers_1.append(powers_1[-1] * coefficient_1)
+        powers_2.append(powers_2[-1] * coefficient_2)
+
+    result = []
+    binomial = 1
+    for k in range(exponent + 1):
+        monomial = tuple([exponent_1 * (exponent - k) + exponent_2 * k
+                          for exponent_1, exponent_2 in zip(monomial_1, monomial_2)])
+        result.append((monomial, binomial * powers_1[exponent - k] * powers_2[k]))
+        binomial = binomial * (exponent - k) // (k + 1)
+    return result
+
+
+def power(polynom: SparsePolynom, exponent: int, multiplier: Any = 1) -> SparsePolynom:
+    if exponent < 0:
+        raise ValueError('only non-negative integer exponents are supported')
+    if exponent == 0:
+        width = len(polynom[0][0]) if polynom else 0
+        return [((0,) * width, multiplier)] if multiplier != 0 else []
+    if not polynom or multiplier == 0:
+        return []
+
+    if len(polynom) == 1:
+        (monomial, coefficient), = polynom
+        result = [(tuple([value * exponent for value in monomial]), coefficient ** exponent)]
+    elif len(polynom) == 2:
+        result = _binomial_power(polynom, exponent)
+    else:
+        # Binary exponentiation: squarings and products both go through multiply(), which picks the heap or the
+        # dict method for each of them.
+        result = None
+        base = polynom
+        while True:
+            if exponent & 1:
+                result = base if result is None else multiply(result, base)
+            exponent >>= 1
+            if not exponent:
+                break
+            base = multiply(base, base)
+
+    if multiplier == 1:
+        return result
+    return [(monomial, coefficient * multiplier) for monomial, coefficient in result]
+
+
+def multiply_terms(expr_1: mexpr.TermOrExpression, expr_2: mexpr.TermOrExpression, multiplier: Any = 1,
+                   method: str = None) -> List[mexpr.Term]:
+    names = variable_names(expr_1, expr_2)
+    _, polynom_1 = from_expression(expr_1, names)
+    _, polynom_2 = from_expression(expr_2, names)
+    return to_terms(names, multiply(polynom_1, polynom_2, multiplier, method))
+
+
+def multiply_expressions(expr_1: mexpr.TermOrExpression, expr_2: mexpr.TermOrExpression, multiplier: Any = 1,
+                         method: str = None) -> mexpr.AbstractExpression:
+    return mexpr.Expression.from_terms(multiply_terms(expr_1, expr_2, multiplier, method))
+
+
+def power_terms(expression: mexpr.TermOrExpression, exponent: int, multiplier: Any = 1) -> List[mexpr.Term]:
+    names, polynom = from_expression(expression)
+    return to_terms(names, power(polynom, exponent, multiplier))
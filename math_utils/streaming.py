@@ -0,0 +1,147 @@
+# -*- coding:Utf-8 -*-
+
+
+from . import expressions as mexpr
+from . import sparse
+from typing import Iterator, Optional, Sequence
+import heapq
+
+
+def min_degree(expression: mexpr.TermOrExpression) -> int:
+    # Lower bound of the degrees of the developed expression, computed without developing it: cancellations can
+    # only remove terms.
+    if isinstance(expression, mexpr.Term):
+        return expression.degree
+    if isinstance(expression, mexpr.AbstractExpression):
+        return min(min_degree(node.term) for node in expression._iter_nodes())
+    if isinstance(expression, mexpr.ExpressionMultiplicationTerm):
+        return min_degree(expression.expr_1) + min_degree(expression.expr_2)
+    if isinstance(expression, mexpr.ExpressionPowerTerm):
+        return min_degree(expression.expr) * expression.exponent if expression.exponent else 0
+    return min_degree(expression.develop())
+
+
+def _truncate(polynom: 'sparse.SparsePolynom', max_degree: Optional[int]) -> 'sparse.SparsePolynom':
+    if max_degree is None:
+        return polynom
+    return [(monomial, coefficient) for monomial, coefficient in polynom if sum(monomial) <= max_degree]
+
+
+def _sorted(polynom: 'sparse.SparsePolynom', ascending: bool) -> 'sparse.SparsePolynom':
+    return sorted(polynom, key=lambda item: sparse.order_key(item[0]), reverse=not ascending)
+
+
+class _Streamer:
+    def __init__(self, names: Sequence[str], ascending: bool) -> None:
+        self.names = tuple(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.ascending = ascending
+
+    def monomial(self, term: mexpr.Term) -> 'sparse.Monomial':
+        row = [0] * len(self.names)
+        for name, exponent in term.variables.items():
+            row[self.index[name]] = exponent
+        return tuple(row)
+
+    def materialize(self, expression: mexpr.TermOrExpression, max_degree: Optional[int]) -> 'sparse.SparsePolynom':
+        return list(self.stream(expression, max_degree))
+
+    def stream(self, expression: mexpr.TermOrExpression, max_degree: Optional[int]) -> Iterator[tuple]:
+        if isinstance(expression, mexpr.Term):
+            if expression.multiplier != 0 and (max_degree is None or expression.degree <= max_degree):
+                yield self.monomial(expression), expression.multiplier
+        elif isinstance(expression, mexpr.AbstractExpression):
+            yield from self._merge([self.stream(node.term, max_degree) for node in expression._iter_nodes()])
+        elif isinstance(expression, mexpr.ExpressionMultiplicationTerm):
+            yield from self._product(expression, max_degree)
+        elif isinstance(expression, mexpr.ExpressionPowerTerm):
+            yield from self._power(expression, max_degree)
+        else:
+            yield from self.stream(expression.develop(), max_degree)
+
+    def _merge(self, streams: list) -> Iterator[tuple]:
+        if len(streams) == 1:
+            yield from streams[0]
+            return
+        current = None
+        coefficient = 0
+        for monomial, value in heapq.merge(*streams, key=lambda item: sparse.order_key(item[0]), reverse=not self.ascending):
+            if monomial == current:
+                coefficient += value
+                continue
+            if current is not None and coefficient != 0:
+                yield current, coefficient
+            current = monomial
+            coefficient = value
+        if current is not None and coefficient != 0:
+            yield current, coefficient
+
+    def _product(self, term: mexpr.ExpressionMultiplicationTerm, max_degree: Optional[int]) -> Iterator[tuple]:
+        # Each factor only needs the terms that can still end up under max_degree once multiplied by the lowest
+        # terms of the other factor.
+        limit_1 = limit_2 = None
+        if max_degree is not None:
+            limit_1 = max_degree - min_degree(term.expr_2)
+            limit_2 = max_degree - min_degree(term.expr_1)
+        polynom_1 = self.materialize(term.expr_1, limit_1)
+        polynom_2 = self.materialize(term.expr_2, limit_2)
+        yield from sparse.iter_multiply(polynom_1, polynom_2, term.multiplier, self.ascending, max_degree)
+
+    def _power(self, term: mexpr.ExpressionPowerTerm, max_degree: Optional[int]) -> Iterator[tuple]:
+        exponent = term.exponent
+        if exponent == 0:
+            if term.multiplier != 0 and (max_degree is None or max_degree >= 0):
+                yield (0,) * len(self.names), term.multiplier
+            return
+        lowest = min_degree(term.expr)
+
+        def limit(used: int) -> Optional[int]:
+            return None if max_degree is None else max_degree - (exponent - used) * lowest
+
+        # sparse.multiply and sparse.power expect their operands in descending order.
+        base = _sorted(self.materialize(term.expr, limit(1)), ascending=False)
+        if max_degree is None:
+            yield from _sorted(sparse.power(base, exponent, term.multiplier), self.ascending)
+            return
+
+        # Binary exponentiation where every intermediate power is truncated to what the remaining factors allow.
+        result = None
+        used = 0
+        power = 1
+        remaining = exponent
+        while True:
+            if remaining & 1:
+                used += power
+                result = base if result is None else _truncate(sparse.multiply(result, base), limit(used))
+            remaining >>= 1
+            if not remaining:
+                break
+            power *= 2
+            base = _truncate(sparse.multiply(base, base), limit(power))
+        for monomial, coefficient in _sorted(result, self.ascending):
+            if sum(monomial) <= max_degree:
+                yield monomial, coefficient * term.multiplier
+
+
+def iter_develop(expression: mexpr.TermOrExpression, max_degree: Optional[int] = None, degree: Optional[int] = None,
+                 ascending: Optional[bool] = None) -> Iterator[mexpr.Term]:
+    if degree is not None:
+        max_degree = degree if max_degree is None else min(max_degree, degree)
+    if ascending is None:
+        ascending = max_degree is not None
+
+    streamer = _Streamer(sorted(expression.variable_names), ascending)
+    names = streamer.names
+    from_tuples = mexpr.Variables.from_tuples
+    empty = mexpr.Variables()
+    for monomial, coefficient in streamer.stream(expression, max_degree):
+        if degree is not None and sum(monomial) != degree:
+            if ascending and sum(monomial) > degree:
+                return
+            continue
+        if any(monomial):
+            variables = from_tuples(tuple(name for name, exponent in zip(names, monomial) if exponent),
+                                    tuple(exponent for exponent in monomial if exponent))
+        else:
+            variables = empty
+        yield mexpr.Term.from_variables(coefficient, variables)
@@ -0,0 +1,144 @@
+# -*- coding:Utf-8 -*-
+
+
+from . import expressions as mexpr
+from typing import Any, Dict, Iterable, List, Mapping, Sequence, Tuple
+
+
+def _is_symbolic(value: Any) -> bool:
+    return isinstance(value, (mexpr.AbstractTerm, mexpr.AbstractExpression))
+
+
+def _power_table(value: Any, exponents: Sequence[int]) -> Dict[int, Any]:
+    # Powers are built by successive products from the smallest needed exponent, so x¹..x⁹ cost 9 products in
+    # total instead of one pow per monomial.
+    table = {0: 1}
+    power = 1
+    current = 0
+    for exponent in sorted({abs(exponent) for exponent in exponents if exponent != 0}):
+        while current < exponent:
+            power = power * value
+            current += 1
+        table[exponent] = power
+    for exponent in exponents:
+        if exponent < 0:
+            # divide() keeps integer powers exact; NumPy arrays and floats are inverted element-wise.
+            power = table[-exponent]
+            table[exponent] = mexpr.divide(1, power) if isinstance(power, int) else 1 / power
+    return table
+
+
+class SubstitutionPlan:
+    def __init__(self, expression: mexpr.TermOrExpression, names: Sequence[str] = None) -> None:
+        developed = expression.develop()
+        if isinstance(developed, mexpr.AbstractTerm):
+            developed = mexpr.Expression(developed)
+        if names is None:
+            names = sorted(developed.variable_names)
+        self.names = tuple(names)
+
+        # Monomials are grouped by what remains of them once the plan's variables are substituted, so a partial
+        # evaluation produces one coefficient per remaining monomial.
+        groups: Dict[mexpr.Variables, Dict[tuple, Any]] = {}
+        for node in developed._iter_nodes():
+            term = node.term
+            if term.is_null():
+                continue
+            variables = term.variables
+            substituted = tuple(variables[name] for name in self.names)
+            rest = mexpr.Variables({name: exponent for name, exponent in variables.items() if name not in self.names})
+            group = groups.setdefault(rest, {})
+            group[substituted] = group.get(substituted, 0) + term.multiplier
+
+        self.groups: List[Tuple[mexpr.Variables, List[Tuple[tuple, Any]]]] = [
+            (rest, [(exponents, coefficient) for exponents, coefficient in group.items() if coefficient != 0])
+            for rest, group in groups.items()]
+        self.exponents = tuple({exponents[i] for _, group in self.groups for exponents, _ in group}
+                               for i in range(len(self.names)))
+
+    @property
+    def remaining_names(self) -> set:
+        names = set()
+        for rest, _ in self.groups:
+            names.update(rest.names)
+        return names
+
+    def _values(self, args: tuple, kwargs: Mapping[str, Any]) -> tuple:
+        if args and kwargs:
+            raise TypeError('values must be given either by position or by name')
+        if args:
+            if len(args) != len(self.names):
+                raise TypeError(f'expected {len(self.names)} values for {", ".join(self.names)}, got {len(args)}')
+            return args
+        missing = [name for name in self.names if name not in kwargs]
+        if missing:
+            raise TypeError(f'missing values for {", ".join(missing)}')
+        return tuple(kwargs[name] for name in self.names)
+
+    def coefficients(self, *args: Any, **kwargs: Any) -> List[Tuple[mexpr.Variables, Any]]:
+        values = self._values(args, kwargs)
+        tables = [_power_table(value, exponents) for value, exponents in zip(values, self.exponents)]
+
+        coefficients = []
+        for rest, group in self.groups:
+            total = 0
+            for exponents, coefficient in group:
+                product = coefficient
+                for table, exponent in zip(tables, exponents):
+                    if exponent:
+                        product = product * table[exponent]
+                total = total + product
+            coefficients.append((rest, total))
+        return coefficients
+
+    def evaluate(self, *args: Any, **kwargs: Any) -> Any:
+        coefficients = self.coefficients(*args, **kwargs)
+        if any(rest.names for rest, _ in coefficients):
+            return mexpr.Expression.from_terms([mexpr.Term.from_variables(coefficient, rest)
+                                                for rest, coefficient in coefficients])
+        return sum(coefficient for _, coefficient in coefficients)
+
+    def evaluate_many(self, value_sets: Iterable[Any]) -> list:
+        results = []
+        for values in value_sets:
+            if isinstance(values, Mapping):
+                results.append(self.evaluate(**values))
+            else:
+                results.append(self.evaluate(*values))
+        return results
+
+
+def substitute(expression: mexpr.TermOrExpression, values: Mapping[str, Any]) -> mexpr.TermOrExpression:
+    numbers = {name: value for name, value in values.items() if not _is_symbolic(value)}
+    symbols = {name: value for name, value in values.items() if _is_symbolic(value)}
+
+    if numbers:
+        plan = SubstitutionPlan(expression, sorted(numbers))
+        terms = [mexpr.Term.from_variables(coefficient, rest) for rest, coefficient in plan.coefficients(**numbers)]
+    else:
+        developed = expression.develop()
+        if isinstance(developed, mexpr.AbstractTerm):
+            terms = [developed]
+        else:
+            terms = [node.term for node in developed._iter_nodes()]
+
+    if not symbols:
+        return mexpr.Expression.from_terms([term for term in terms if not term.is_null()]).develop()
+
+    developed_terms = []
+    for term in terms:
+        if term.is_null():
+            continue
+        variables = term.variables
+        product = mexpr.Expression(mexpr.Term.from_variables(term.multiplier, mexpr.Variables(
+            {name: exponent for name, exponent in variables.items() if name not in symbols})))
+        for name, value in symbols.items():
+            exponent = variables[name]
+            if exponent < 0:
+                raise ValueError(f'cannot substitute an expression for {name} with a negative exponent')
+            if exponent:
+                product = (product * value ** exponent).develop()
+                if isinstance(product, mexpr.AbstractTerm):
+                    product = mexpr.Expression(product)
+        developed_terms.extend(node.term for node in product._iter_nodes())
+    return mexpr.Expression.from_terms(developed_terms).develop()
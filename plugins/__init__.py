@@ -1,10 +1,15 @@
 # -*- coding:Utf-8 -*-
 
+import importlib
+
+_plugin_modules = {}
+
 
 def get_plugin(plugin_name):
-    return globals()[plugin_name]
+    module = importlib.import_module(f'.{_plugin_modules[plugin_name]}', __name__)
+    return getattr(module, plugin_name)
 
-# plug-in imports
-from .base_math import BaseMathPlugin
-from .base import BasePlugin
-from .math_plot import PlottingPlugin
\ No newline at end of file
+# plug-in modules
+_plugin_modules['BaseMathPlugin'] = 'base_math'
+_plugin_modules['BasePlugin'] = 'base'
+_plugin_modules['PlottingPlugin'] = 'math_plot'
\ No newline at end of file
@@ -2,6 +2,9 @@
 
 from .plugin_base_class import Plugin
 from math_utils.math_sets import ListSet, Interval, NULL, REAL, RELATIVE, NATURAL, Set
+from math_utils.intervals import Bounds, IndeterminateComparison
+from math_utils import intervals
+from .console_functions import console_function
 import re
 import math
 
@@ -31,12 +34,14 @@ class BaseMathPlugin(Plugin):
         self.add_shortcut('Ctrl+0', 'insert_key', '⁰')
         
         self.power_re = re.compile(r'(⁻?[⁰¹²³⁴⁵⁶⁷⁸⁹]+)')
+        self.power_table = str.maketrans('⁻⁰¹²³⁴⁵⁶⁷⁸⁹', '-0123456789')
         self.add_action(self.power_parser)
         
         self.sqrt_re = re.compile(r'√([(].+[)])')
         self.add_action(self.sqrt_parser)
         
         self.function_re = re.compile(r'([fghpijklm])[(]([a-z])[)][ ]?=(.*)')
+        self.function_memo_size = 1024
         self.add_action(self.function_parser)
         
         self.multiplication_re = re.compile(r'(\d|[)])([a-z(])')
@@ -57,20 +62,26 @@ class BaseMathPlugin(Plugin):
         
     def power_parser(self, line, locals_, globals_):
         line = self.power_re.sub(r'**\1', line)
-        line = line.replace('⁻', '-').replace('⁰', '0').replace('¹', '1').replace('²', '2').replace('³', '3').replace('⁴', '4').replace('⁵', '5')
-        line = line.replace('⁶', '6').replace('⁷', '7').replace('⁸', '8').replace('⁹', '9')
-        return line
+        return line.translate(self.power_table)
     
     def sqrt_parser(self, line, locals_, globals_):
         if 'sqrt' not in globals_:
-            globals_['sqrt'] = math.sqrt
+            globals_['sqrt'] = intervals.sqrt
         
         line = self.sqrt_re.sub(r'sqrt\1', line)
         return line
     
     def function_parser(self, line, locals_, globals_):
-        line = self.function_re.sub(r'def \1(\2): return \3', line)
+        if 'console_function' not in globals_:
+            globals_['console_function'] = console_function
+        line = self.function_re.sub(self._function_parser_repl, line)
         return line
+    
+    def _function_parser_repl(self, match):
+        # The expression source is passed to the decorator as a string: the following actions rewrite it exactly
+        # like the function body, so the vectorized variant is built from the final source.
+        name, argument, source = match.groups()
+        return f'@console_function({argument!r}, {source!r}, {self.function_memo_size})\ndef {name}({argument}): return {source}'
         
     def multiplication_parser(self, line, locals_, globals_):
         line = self.multiplication_re.sub(r'\1 * \2', line)
@@ -146,11 +157,39 @@ class BaseMathPlugin(Plugin):
     def domain_restricted_function(self, domain):
         def decorator(func):
             def callback(x):
+                if isinstance(x, Bounds):
+                    return self._bounded_call(func, domain, x)
+                if hasattr(x, '__array__') and callback.vectorized is not None:
+                    return callback.vectorized(x)
                 if x in domain:
                     return func(x)
                 return math.nan
+            callback.vectorized = self._vectorized_restriction(func, domain)
             return callback
         return decorator
+    
+    @staticmethod
+    def _vectorized_restriction(func, domain):
+        vectorized = getattr(func, 'vectorized', None)
+        if vectorized is None or not isinstance(domain, Interval):
+            return None
+        import numpy as np
+        
+        def restricted(array):
+            array = np.asarray(array, dtype=np.float64)
+            lower = array > domain.start if domain.start_exclusiv else array >= domain.start
+            upper = array < domain.stop if domain.stop_exclusiv else array <= domain.stop
+            return np.where(lower & upper, vectorized(array), math.nan)
+        return restricted
+    
+    @staticmethod
+    def _bounded_call(func, domain, bounds):
+        if isinstance(domain, Interval):
+            if bounds.is_disjoint(domain):
+                return math.nan
+            if bounds.is_within(domain):
+                return func(bounds)
+        raise IndeterminateComparison(f'cannot decide whether {bounds!r} is in the domain')
         
         
 
@@ -0,0 +1,99 @@
+# -*- coding:Utf-8 -*-
+
+from collections import OrderedDict
+import ast
+import functools
+import math
+
+ARRAY_FUNCTIONS = {'sqrt': 'sqrt', 'sin': 'sin', 'cos': 'cos', 'tan': 'tan', 'exp': 'exp', 'log': 'log',
+                   'abs': 'abs', 'floor': 'floor', 'ceil': 'ceil'}
+ARRAY_CONSTANTS = {'inf': math.inf, 'pi': math.pi}
+ARRAY_NODES = (ast.Expression, ast.BinOp, ast.UnaryOp, ast.Constant, ast.Name, ast.Call, ast.Load,
+               ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.USub, ast.UAdd)
+
+
+def is_array_safe(argument, source):
+    # Only arithmetic on the argument, numeric constants and functions with a NumPy counterpart: the same source
+    # then gives the same values whether it runs on a float or element-wise on an array.
+    try:
+        tree = ast.parse(source.strip(), mode='eval')
+    except SyntaxError:
+        return False
+    for node in ast.walk(tree):
+        if not isinstance(node, ARRAY_NODES):
+            return False
+        if isinstance(node, ast.Constant) and not isinstance(node.value, (int, float)):
+            return False
+        if isinstance(node, ast.Name) and node.id != argument and node.id not in ARRAY_FUNCTIONS and node.id not in ARRAY_CONSTANTS:
+            return False
+        if isinstance(node, ast.Call) and (not isinstance(node.func, ast.Name) or node.func.id not in ARRAY_FUNCTIONS or node.keywords):
+            return False
+    return True
+
+
+def vectorize(argument, source):
+    try:
+        import numpy as np
+    except ImportError:
+        return None
+    namespace = {name: getattr(np, numpy_name) for name, numpy_name in ARRAY_FUNCTIONS.items()}
+    namespace.update(ARRAY_CONSTANTS)
+    function = eval(compile(f'lambda {argument}: {source.strip()}', '<console>', 'eval'), namespace)
+
+    @functools.wraps(function)
+    def vectorized(array):
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            result = np.asarray(function(np.asarray(array, dtype=np.float64)), dtype=np.float64)
+        if result.ndim == 0:
+            result = np.full(np.shape(array), float(result))
+        result[~np.isfinite(result)] = math.nan
+        return result
+    return vectorized
+
+
+class ConsoleFunction:
+    def __init__(self, function, argument, source, memo_size=1024):
+        functools.update_wrapper(self, function)
+        self.function = function
+        self.argument = argument
+        self.source = source
+        array_safe = is_array_safe(argument, source)
+        self.vectorized = vectorize(argument, source) if array_safe else None
+        # Only functions of their argument alone can be cached: anything else may read a variable that the user
+        # rebinds later.
+        self.memo_size = memo_size if array_safe else 0
+        self._memo = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, x):
+        if hasattr(x, '__array__') and self.vectorized is not None:
+            return self.vectorized(x)
+        if not self.memo_size or type(x) not in (int, float):
+            return self.function(x)
+
+        key = (type(x), x)
+        try:
+            value = self._memo[key]
+        except KeyError:
+            self.misses += 1
+            value = self._memo[key] = self.function(x)
+            if len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+            return value
+        self.hits += 1
+        self._memo.move_to_end(key)
+        return value
+
+    def cache_clear(self):
+        self._memo.clear()
+        self.hits = self.misses = 0
+
+    def __repr__(self):
+        return f'{self.__name__}({self.argument}) = {self.source.strip()}'
+
+
+def console_function(argument, source, memo_size=1024):
+    def decorator(function):
+        return ConsoleFunction(function, argument, source, memo_size)
+    return decorator
@@ -0,0 +1,70 @@
+# -*- coding:Utf-8 -*-
+
+import numpy as np
+
+
+def minmax(array_x, array_y, max_points):
+    # Keeps the first, last, lowest and highest sample of each bucket: peaks survive whatever the bucket size.
+    length = len(array_x)
+    if length <= max_points:
+        return array_x, array_y
+    buckets = max(max_points // 4, 1)
+    edges = np.linspace(0, length, buckets + 1).astype(np.int64)
+    indices = [0, length - 1]
+    for start, stop in zip(edges[:-1], edges[1:]):
+        if stop <= start:
+            continue
+        bucket = array_y[start:stop]
+        indices.extend((start, stop - 1, start + int(np.argmin(bucket)), start + int(np.argmax(bucket))))
+    indices = np.unique(np.array(indices, dtype=np.int64))
+    return array_x[indices], array_y[indices]
+
+
+def lttb(array_x, array_y, max_points):
+    # Largest-Triangle-Three-Buckets: in each bucket, keeps the point making the largest triangle with the
+    # previously kept point and the mean of the next bucket.
+    length = len(array_x)
+    if length <= max_points or max_points < 3:
+        return array_x, array_y
+    every = (length - 2) / (max_points - 2)
+    indices = np.empty(max_points, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = length - 1
+    previous = 0
+    for i in range(max_points - 2):
+        start = int(i * every) + 1
+        stop = max(int((i + 1) * every) + 1, start + 1)
+        next_stop = min(int((i + 2) * every) + 1, length)
+        if next_stop <= stop:
+            mean_x, mean_y = array_x[-1], array_y[-1]
+        else:
+            mean_x = array_x[stop:next_stop].mean()
+            mean_y = array_y[stop:next_stop].mean()
+        bucket_x = array_x[start:stop]
+        bucket_y = array_y[start:stop]
+        areas = np.abs((array_x[previous] - mean_x) * (bucket_y - array_y[previous]) -
+                       (array_x[previous] - bucket_x) * (mean_y - array_y[previous]))
+        previous = start + int(np.argmax(areas))
+        indices[i + 1] = previous
+    return array_x[indices], array_y[indices]
+
+
+methods = {'minmax': minmax, 'lttb': lttb}
+
+
+def segments(array_x, array_y):
+    defined = ~np.isnan(array_y)
+    changes = np.flatnonzero(np.diff(defined.astype(np.int8))) + 1
+    bounds = np.concatenate(([0], changes, [len(array_y)]))
+    return [(array_x[start:stop], array_y[start:stop]) for start, stop in zip(bounds[:-1], bounds[1:])
+            if stop > start and defined[start]]
+
+
+def downsample_segments(parts, max_points, method='minmax'):
+    if max_points is None:
+        return parts
+    function = methods[method]
+    total = sum(len(array_x) for array_x, _ in parts)
+    if total <= max_points:
+        return parts
+    return [function(array_x, array_y, max(int(max_points * len(array_x) / total), 4)) for array_x, array_y in parts]
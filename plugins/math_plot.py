@@ -2,44 +2,124 @@
 # -*- coding:Utf-8 -*-
 
 from .plugin_base_class import Plugin
-import matplotlib.pyplot as plt
-import numpy as np
+from math_utils.intervals import Bounds
 import math
+import os
 
 
 class PlottingPlugin(Plugin):
     def __init__(self):
         super().__init__()
         
+        self.output_directory = None
+        self._plot_count = 0
+        self.prune_block = 32
+        self.max_points = 4000
+        self.downsampling = 'minmax'
+        self.export_format = 'png'
+        
         self.add_action(self.define_plot_function)
         
-    def plot(self, function, interval, precision=1000, threshold_max=math.inf, threshold_min=-math.inf):
+    def plot(self, function, interval, precision=1000, threshold_max=math.inf, threshold_min=-math.inf, path=None):
+        array_x, array_y = self._sample(function, interval, precision, threshold_max, threshold_min)
+        
+        if path is None and self.output_directory is None:
+            import matplotlib.pyplot as plt
+            from . import downsampling
+            
+            figure = plt.figure()
+            for segment_x, segment_y in downsampling.downsample_segments(downsampling.segments(array_x, array_y),
+                                                                         self.max_points, self.downsampling):
+                plt.plot(segment_x, segment_y)
+            plt.show()
+            # Outside interactive mode show() has returned once the window is closed, or at once with a
+            # non-interactive backend such as Agg: the figure is not needed anymore either way.
+            if not plt.isinteractive():
+                plt.close(figure)
+            return None
+        
+        if path is None:
+            self._plot_count += 1
+            path = os.path.join(self.output_directory, f'plot_{self._plot_count}.{self.export_format}')
+        return self._export(array_x, array_y, path)
+    
+    def export_plots(self, plots, directory=None, export_format=None):
+        directory = directory or self.output_directory or '.'
+        export_format = export_format or self.export_format
+        os.makedirs(directory, exist_ok=True)
+        
+        paths = []
+        for i, arguments in enumerate(plots, 1):
+            if isinstance(arguments, dict):
+                arguments = dict(arguments)
+                path = arguments.pop('path', os.path.join(directory, f'plot_{i}.{export_format}'))
+                paths.append(self.plot(path=path, **arguments))
+            else:
+                paths.append(self.plot(*arguments, path=os.path.join(directory, f'plot_{i}.{export_format}')))
+        return paths
+    
+    def _sample(self, function, interval, precision, threshold_max, threshold_min):
+        import numpy as np
+        
         array_x = np.linspace(interval.start, interval.stop, precision)
+        vectorized = getattr(function, 'vectorized', None)
+        if vectorized is not None:
+            defined = ~np.isnan(vectorized(np.round(array_x, 1)))
+            array_y = np.where(defined, vectorized(array_x), math.nan)
+            array_y[(array_y < threshold_min) | (array_y > threshold_max)] = math.nan
+            return array_x, array_y
+        
         array_y = np.zeros(precision, dtype=np.float64)
-        no_definition_points = []
+        skipped = self._pruned_samples(function, array_x, threshold_max, threshold_min)
         
         for i, x in enumerate(array_x.flat):
-            if math.isnan(function(round(x, 1))):
+            if i in skipped:
+                value = math.nan
+            elif math.isnan(function(round(x, 1))):
                 value = math.nan
             else:
                 value = function(x)
             if value < threshold_min or value > threshold_max:
                 value = math.nan
-            if math.isnan(value):
-                no_definition_points.append(i)
             array_y[i] = value
+        return array_x, array_y
+    
+    def _export(self, array_x, array_y, path):
+        # A standalone Figure renders through the Agg or SVG canvas without touching pyplot, so no window is
+        # opened and no figure is left registered once the file is written.
+        from matplotlib.figure import Figure
+        from . import downsampling
         
-        print(no_definition_points)
-        
-        previous_point = 0
-        for point in no_definition_points:
-            plt.plot(array_x[previous_point:point], array_y[previous_point:point])
-            previous_point = point
-        plt.plot(array_x[previous_point:], array_y[previous_point:])
+        figure = Figure()
+        axes = figure.subplots()
+        for segment_x, segment_y in downsampling.downsample_segments(downsampling.segments(array_x, array_y),
+                                                                     self.max_points, self.downsampling):
+            axes.plot(segment_x, segment_y)
+        figure.savefig(path)
+        return path
         
-        plt.show()
+    def _pruned_samples(self, function, array_x, threshold_max, threshold_min):
+        # The function is evaluated once over each block of samples with interval arithmetic; blocks whose bounds
+        # are entirely outside the thresholds, or outside the function domain, are not sampled at all.
+        skipped = set()
+        for start in range(0, len(array_x), self.prune_block):
+            stop = min(start + self.prune_block, len(array_x))
+            try:
+                bounds = function(Bounds(float(array_x[start]), float(array_x[stop - 1])))
+            except (TypeError, ValueError, ArithmeticError):
+                continue
+            if isinstance(bounds, float) and math.isnan(bounds):
+                skipped.update(range(start, stop))
+            elif isinstance(bounds, (int, float)):
+                if bounds > threshold_max or bounds < threshold_min:
+                    skipped.update(range(start, stop))
+            elif isinstance(bounds, Bounds) and (bounds.is_above(threshold_max) or bounds.is_below(threshold_min)):
+                skipped.update(range(start, stop))
+        return skipped
         
     def define_plot_function(self, line, locals_, globals_):
         if 'plot' not in globals_:
             globals_['plot'] = self.plot
+        if 'export_plots' not in globals_:
+            globals_['export_plots'] = self.export_plots
         return line
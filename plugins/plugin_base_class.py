@@ -1,7 +1,5 @@
 # -*- coding:Utf-8 -*-
 
-from PyQt5.QtWidgets import QShortcut
-from PyQt5.QtGui import QKeySequence
 
 class Plugin:
     def __init__(self):
@@ -21,6 +19,8 @@ class Plugin:
             parent.add_sequence(function)
         
         for str_sequence, command_name, command_args in self._shortcuts:
+            if command_name not in parent.commands:
+                continue
             command = self._get_command(parent.commands[command_name], command_args)
             parent.add_shortcut(str_sequence, command)
         
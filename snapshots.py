@@ -0,0 +1,80 @@
+# -*- coding:Utf-8 -*-
+
+import mmap
+import pickle
+import struct
+
+MAGIC = b'MUSNAP'
+VERSION = 1
+
+_HEADER = struct.Struct('<6sH')
+_SIZE = struct.Struct('<Q')
+_COUNT = struct.Struct('<I')
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+def _is_picklable(value):
+    try:
+        pickle.dumps(value, protocol=5, buffer_callback=lambda buffer: None)
+    except Exception:
+        return False
+    return True
+
+
+def save_snapshot(namespace, sources, path):
+    values = {}
+    skipped = []
+    for name, value in namespace.items():
+        if name in sources:
+            continue
+        if _is_picklable(value):
+            values[name] = value
+        else:
+            skipped.append(name)
+
+    buffers = []
+    payload = pickle.dumps({'values': values, 'sources': list(sources.items())}, protocol=5, buffer_callback=buffers.append)
+
+    with open(path, 'wb') as file:
+        file.write(_HEADER.pack(MAGIC, VERSION))
+        file.write(_SIZE.pack(len(payload)))
+        file.write(payload)
+        file.write(_COUNT.pack(len(buffers)))
+        for buffer in buffers:
+            data = buffer.raw()
+            file.write(_SIZE.pack(data.nbytes))
+            file.write(data)
+    return skipped
+
+
+def load_snapshot(path):
+    with open(path, 'rb') as file:
+        mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    view = memoryview(mapping)
+    magic, version = _HEADER.unpack_from(view)
+    if magic != MAGIC:
+        raise SnapshotError(f'{path} is not a console snapshot')
+    if version > VERSION:
+        raise SnapshotError(f'snapshot version {version} is newer than the supported version {VERSION}')
+
+    offset = _HEADER.size
+    payload_size, = _SIZE.unpack_from(view, offset)
+    offset += _SIZE.size
+    payload = view[offset:offset + payload_size]
+    offset += payload_size
+
+    count, = _COUNT.unpack_from(view, offset)
+    offset += _COUNT.size
+    buffers = []
+    for _ in range(count):
+        size, = _SIZE.unpack_from(view, offset)
+        offset += _SIZE.size
+        buffers.append(view[offset:offset + size])
+        offset += size
+
+    content = pickle.loads(payload, buffers=buffers)
+    return content['values'], content['sources']
@@ -0,0 +1,26 @@
+import os
+
+from console import Console
+
+PLUGINS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'plugins.txt')
+
+
+def new_console():
+    console = Console()
+    console.load_plugins(PLUGINS)
+    return console
+
+
+def test_console_functions_are_saved_and_restored(tmp_path):
+    console = new_console()
+    console.run_line('f(x)=x**2+1')
+    console.run_line('k = 3')
+    path = str(tmp_path / 'session.snapshot')
+    _, execution, value = console.run_line(f'%save {path}')
+    assert execution == 0 and value == f'session saved to {path}'
+
+    restored = new_console()
+    _, execution, value = restored.run_line(f'%restore {path}')
+    assert execution == 0 and value == f'session restored from {path}'
+    assert restored.run_line('f(3)')[1:] == (0, 10)
+    assert restored.run_line('k')[1:] == (0, 3)
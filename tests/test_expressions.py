@@ -0,0 +1,20 @@
+from math_utils import expressions as mexpr
+
+
+def x_plus(constant):
+    return mexpr.Expression.from_terms([mexpr.Term(1, x=1), mexpr.Term(constant)])
+
+
+def test_derive_develop_on_product():
+    a, b = x_plus(1), x_plus(2)
+    product = mexpr.Expression(mexpr.ExpressionMultiplicationTerm(a, b))
+    derivative = product.derive('x', develop=True)
+    assert derivative.develop() == product.develop().derive('x')
+    assert derivative.is_polynom()
+
+
+def test_derive_develop_on_power():
+    power = mexpr.Expression(mexpr.ExpressionPowerTerm(x_plus(1), 3))
+    derivative = power.derive('x', develop=True)
+    assert derivative == power.develop().derive('x')
+    assert power.derive('x').develop() == derivative
@@ -0,0 +1,8 @@
+from math_utils import expressions as mexpr
+
+
+def test_factor_keeps_content_of_single_factor():
+    expression = mexpr.Expression.from_terms([mexpr.Term(2, x=2), mexpr.Term(4)])
+    factored = expression.factor()
+    assert isinstance(factored.term, mexpr.ExpressionMultiplicationTerm)
+    assert factored.develop() == expression
@@ -0,0 +1,14 @@
+from concurrent.futures import ThreadPoolExecutor
+from math_utils import expressions as mexpr
+from math_utils.parallel import develop_parallel
+
+
+def polynom(size, offset):
+    return mexpr.Expression.from_terms([mexpr.Term(i + offset, x=i, y=size - i) for i in range(size)])
+
+
+def test_develop_parallel_matches_develop():
+    expression = polynom(30, 1) * polynom(30, 2) * polynom(20, 3) * polynom(10, 4) * polynom(5, 5)
+    with ThreadPoolExecutor(4) as executor:
+        developed = develop_parallel(expression, processes=4, threshold=100, executor=executor)
+    assert developed == expression.develop()
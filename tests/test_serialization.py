@@ -0,0 +1,14 @@
+from math_utils import expressions as mexpr
+from math_utils import serialization
+
+
+def test_sparse_high_degree_polynom_is_not_written_dense():
+    expression = mexpr.Expression.from_terms([mexpr.Term(1, x=10 ** 7), mexpr.Term(1)])
+    data = serialization.dumps(expression)
+    assert len(data) < 1024
+    assert serialization.loads(data) == expression
+
+
+def test_dense_polynom_round_trips():
+    expression = mexpr.Expression.from_terms([mexpr.Term(exponent + 1, x=exponent) for exponent in range(50)])
+    assert serialization.loads(serialization.dumps(expression)) == expression
@@ -0,0 +1,21 @@
+from fractions import Fraction
+from math_utils import expressions as mexpr
+from math_utils.substitution import SubstitutionPlan
+import pytest
+
+
+def expression_with_negative_exponent():
+    return mexpr.Expression.from_terms([mexpr.Term(3, x=2), mexpr.Term(2, x=-1), mexpr.Term(1)])
+
+
+def test_negative_exponent_with_array():
+    np = pytest.importorskip('numpy')
+    plan = SubstitutionPlan(expression_with_negative_exponent())
+    values = np.array([1.0, 2.0, 4.0])
+    result = plan.evaluate(values)
+    assert np.allclose(result, 3 * values ** 2 + 2 / values + 1)
+
+
+def test_negative_exponent_stays_exact_with_ints():
+    plan = SubstitutionPlan(expression_with_negative_exponent())
+    assert plan.evaluate_many([(1,), (3,)]) == [6, Fraction(86, 3)]